@@ -0,0 +1,79 @@
+"""
+Async-native variants of the hot account read endpoints, for ASGI deployments.
+"""
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+
+from apps.common.async_views import AsyncAPIView
+from apps.common.http import make_etag
+from apps.rbac.cache import aget_permission_version, aget_user_version
+
+from .filters import filter_customers
+from .models import User
+from .serializers import MeSerializer
+from .views import CustomerListView, CustomerPagination, wants_cursor_pagination
+
+
+class AsyncMeView(AsyncAPIView):
+    async def get(self, request):
+        user = request.user
+        etag = make_etag(user.pk, await aget_user_version(user.pk), await aget_permission_version())
+        return await self.conditional_response(etag, self._get)
+
+    async def _get(self):
+        user = self.request.user
+        serializer = MeSerializer(user, context={"role_slugs": await user.aget_role_slugs()})
+        return JsonResponse(serializer.data)
+
+
+class AsyncCustomerListView(AsyncAPIView):
+    """
+    CustomerListView for ASGI: the same filter_customers() queryset, the same
+    paginators and the same serializer, with rows fetched asynchronously.
+    """
+
+    pagination = CustomerPagination
+    cursor_pagination = CustomerListView.cursor_pagination_class
+    serializer_class = CustomerListView.serializer_class
+
+    def serialize(self, rows):
+        return self.serializer_class(rows, many=True).data
+
+    async def get_cursor_page(self, queryset):
+        paginator = self.cursor_pagination()
+        paginator.request = self.request
+        try:
+            window = paginator.get_window(queryset, self.request.GET)
+        except NotFound as exc:
+            return JsonResponse({"detail": exc.detail}, status=status.HTTP_404_NOT_FOUND)
+        rows = paginator.set_page([row async for row in window])
+        return JsonResponse(paginator.get_paginated_data(self.serialize(rows)))
+
+    async def get_page(self, queryset):
+        params = self.request.GET
+        pagination = self.pagination()
+        pagination.request = self.request
+        paginator = pagination.get_paginator(queryset, pagination.get_page_size_from(params), params)
+
+        def page_and_count():
+            page = paginator.page(pagination.get_page_number_from(params, paginator))
+            # Resolve the (possibly estimated) total here too; the paginator caches it.
+            return page, paginator.count
+
+        try:
+            page, _ = await sync_to_async(page_and_count)()
+        except InvalidPage:
+            return JsonResponse({"detail": str(pagination.invalid_page_message)}, status=status.HTTP_404_NOT_FOUND)
+        page.object_list = [row async for row in page.object_list]
+        pagination.page = page
+        return JsonResponse(pagination.get_paginated_data(self.serialize(page.object_list)))
+
+    async def get(self, request):
+        # Search may probe the schema for the FTS index, which is a sync query.
+        queryset = await sync_to_async(filter_customers)(User.objects.all(), request.GET)
+        if wants_cursor_pagination(request.GET):
+            return await self.get_cursor_page(queryset)
+        return await self.get_page(queryset)
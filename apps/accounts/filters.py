@@ -0,0 +1,52 @@
+"""
+Ordering and search for the customer list, shared by CustomerListView, its
+async twin and the export command so they always select the same rows.
+"""
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .search import is_ranked, search_customers
+
+ORDERING_FIELDS = ("first_name", "last_name", "email", "id")
+
+DEFAULT_ORDERING = ("first_name", "id")
+
+
+def get_ordering(params):
+    """
+    Valid `ordering` terms from the query params, in the order given.
+    """
+    terms = (term.strip() for term in params.get(api_settings.ORDERING_PARAM, "").split(","))
+    return [term for term in terms if term.lstrip("-") in ORDERING_FIELDS]
+
+
+def get_search_terms(params):
+    return params.get(api_settings.SEARCH_PARAM, "").replace("\x00", "").replace(",", " ").split()
+
+
+def filter_customers(queryset, params):
+    """
+    Apply `ordering` and `search` from `params`. Search results are ordered
+    by rank unless a valid `ordering` was given.
+    """
+    ordering = get_ordering(params)
+    queryset = queryset.order_by(*(ordering or DEFAULT_ORDERING))
+    terms = get_search_terms(params)
+    if terms:
+        queryset = search_customers(queryset, terms)
+        if not ordering and is_ranked(queryset):
+            queryset = queryset.order_by("-search_rank", "id")
+    return queryset
+
+
+class CustomerFilter(filters.BaseFilterBackend):
+    """
+    Filter backend wrapping `filter_customers`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        return filter_customers(queryset, request.query_params)
+
+    def get_schema_operation_parameters(self, view):
+        search = filters.SearchFilter().get_schema_operation_parameters(view)
+        return search + filters.OrderingFilter().get_schema_operation_parameters(view)
@@ -0,0 +1,80 @@
+"""
+DDL for the SQLite customer search index.
+
+`accounts_user_fts` is an FTS5 table mirrored from `accounts_user` by three
+triggers. SQLite drops a table's triggers whenever Django rebuilds it (most
+AlterField/AddField operations do), so any migration that rebuilds
+`accounts_user` must call `install_sqlite_fts` again afterwards; the helper
+is idempotent and re-indexes every user.
+"""
+FTS_TABLE = "accounts_user_fts"
+
+FTS_TRIGGERS = ("accounts_user_fts_insert", "accounts_user_fts_update", "accounts_user_fts_delete")
+
+_CREATE_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+    USING fts5(user_id UNINDEXED, first_name, last_name, email, tokenize = 'unicode61')
+"""
+
+_CREATE_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS accounts_user_fts_insert AFTER INSERT ON accounts_user BEGIN
+        INSERT INTO {FTS_TABLE} (user_id, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS accounts_user_fts_update
+    AFTER UPDATE OF id, first_name, last_name, email ON accounts_user BEGIN
+        DELETE FROM {FTS_TABLE} WHERE user_id = old.id;
+        INSERT INTO {FTS_TABLE} (user_id, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS accounts_user_fts_delete AFTER DELETE ON accounts_user BEGIN
+        DELETE FROM {FTS_TABLE} WHERE user_id = old.id;
+    END
+    """,
+)
+
+_REBUILD = (
+    f"DELETE FROM {FTS_TABLE}",
+    f"""
+    INSERT INTO {FTS_TABLE} (user_id, first_name, last_name, email)
+    SELECT id, first_name, last_name, email FROM accounts_user
+    """,
+)
+
+
+def install_sqlite_fts(schema_editor):
+    """
+    Create the FTS table and triggers if missing and re-index every user.
+    No-op on other databases.
+    """
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in (_CREATE_TABLE, *_CREATE_TRIGGERS, *_REBUILD):
+        schema_editor.execute(statement)
+
+
+def uninstall_sqlite_fts(schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for trigger in FTS_TRIGGERS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def sqlite_fts_installed(connection):
+    """
+    True if the FTS table and all of its sync triggers exist.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master WHERE (type = 'table' AND name = %s) "
+            "OR (type = 'trigger' AND tbl_name = 'accounts_user')",
+            [FTS_TABLE],
+        )
+        found = {name for _, name in cursor.fetchall()}
+    return FTS_TABLE in found and set(FTS_TRIGGERS) <= found
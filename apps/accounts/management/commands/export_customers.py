@@ -0,0 +1,44 @@
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, stream_export
+from apps.accounts.filters import ORDERING_FIELDS, filter_customers
+from apps.accounts.models import User
+
+
+class Command(BaseCommand):
+    help = "Stream every customer to a CSV or NDJSON file (or stdout) with constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--export", choices=sorted(EXPORT_FORMATS), default="csv", help="Output format.")
+        parser.add_argument("--output", default="-", help="Target file, or '-' for stdout.")
+        parser.add_argument("--search", default="", help="Same as the customer list's `search` param.")
+        parser.add_argument("--ordering", default="", help="Same as the customer list's `ordering` param.")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def get_queryset(self, options):
+        ordering = [field.strip() for field in options["ordering"].split(",") if field.strip()]
+        invalid = [field for field in ordering if field.lstrip("-") not in ORDERING_FIELDS]
+        if invalid:
+            raise CommandError(f"Unsupported ordering: {', '.join(invalid)}.")
+        return filter_customers(User.objects.all(), {"ordering": options["ordering"], "search": options["search"]})
+
+    def handle(self, *args, **options):
+        queryset = self.get_queryset(options)
+        lines = stream_export(queryset, options["export"], chunk_size=options["chunk_size"])
+        to_stdout = options["output"] == "-"
+        target = None if to_stdout else open(options["output"], "w", newline="")
+        # Lines carry their own terminators; OutputWrapper must not add one.
+        write = partial(self.stdout.write, ending="") if to_stdout else target.write
+        written = 0
+        try:
+            for line in lines:
+                write(line)
+                written += 1
+        finally:
+            if target is not None:
+                target.close()
+        if options["output"] != "-":
+            rows = written - 1 if options["export"] == "csv" else written
+            self.stderr.write(self.style.SUCCESS(f"Exported {rows} customers to {options['output']}."))
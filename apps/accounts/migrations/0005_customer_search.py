@@ -0,0 +1,41 @@
+from django.db import migrations
+
+from apps.accounts.fts import install_sqlite_fts, uninstall_sqlite_fts
+
+# Must match apps.accounts.search.PG_VECTOR_SQL.
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX IF NOT EXISTS accounts_user_search_idx ON accounts_user USING gin ((
+        setweight(to_tsvector('simple', coalesce("accounts_user"."first_name", '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce("accounts_user"."last_name", '')), 'A') ||
+        setweight(to_tsvector('simple', translate(coalesce("accounts_user"."email", ''), '@.', '  ')), 'B')
+    ))
+    """,
+]
+
+POSTGRES_REVERSE = ["DROP INDEX IF EXISTS accounts_user_search_idx"]
+
+
+def forward(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in POSTGRES_FORWARD:
+            schema_editor.execute(statement)
+    install_sqlite_fts(schema_editor)
+
+
+def reverse(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in POSTGRES_REVERSE:
+            schema_editor.execute(statement)
+    uninstall_sqlite_fts(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_user_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, reverse),
+    ]
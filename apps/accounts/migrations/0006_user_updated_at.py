@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:54
+
+from django.db import migrations, models
+
+from apps.accounts.fts import install_sqlite_fts
+
+
+def reinstall_search_index(apps, schema_editor):
+    # Adding a column rebuilds accounts_user on SQLite, which drops its triggers.
+    install_sqlite_fts(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_customer_search'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        # Runs last when unapplying, after RemoveField has rebuilt the table again.
+        migrations.RunPython(migrations.RunPython.noop, reinstall_search_index),
+        migrations.AddField(
+            model_name='user',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['updated_at', 'id'], name='accounts_user_updated_id_idx'),
+        ),
+        migrations.RunPython(reinstall_search_index, migrations.RunPython.noop),
+    ]
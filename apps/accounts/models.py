@@ -19,6 +19,17 @@ class User(AbstractUser):
         choices=Roles.choices,
         default=Roles.CUSTOMER,  # normal user
     )
+    # Queryset .update() calls must set this themselves (auto_now only runs on save()).
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Keyset pagination keys for the customer list; email is already unique.
+            models.Index(fields=["first_name", "id"], name="accounts_user_first_id_idx"),
+            models.Index(fields=["last_name", "id"], name="accounts_user_last_id_idx"),
+            # Delta sync feed key.
+            models.Index(fields=["updated_at", "id"], name="accounts_user_updated_id_idx"),
+        ]
 
     @property
     def is_admin_role(self):
@@ -34,25 +45,67 @@ class User(AbstractUser):
         """
         if not hasattr(self, "roles"):
             return []
-        return list(self.roles.values_list("slug", flat=True))
+        if "active_user_roles" in self.__dict__:
+            return list(dict.fromkeys(link.role.slug for link in self.active_user_roles))
+        return list(self._role_slugs_queryset())
 
-    def get_permission_codes(self):
+    @staticmethod
+    def role_slugs_prefetch():
         """
-        Compute permission codes from all roles assigned to the user.
+        Prefetch the active role links of many users in one query; consumed by
+        `get_role_slugs`. Ordered by slug, like the non-prefetched lookup.
         """
-        from apps.rbac.models import Permission as RbacPermission
+        from apps.rbac.models import UserRole
 
-        if getattr(self, "is_superuser", False):
-            return set(RbacPermission.objects.values_list("code", flat=True))
+        return models.Prefetch(
+            "user_roles",
+            queryset=UserRole.objects.filter(role__is_deleted=False).select_related("role").order_by("role__slug"),
+            to_attr="active_user_roles",
+        )
 
+    async def aget_role_slugs(self):
         if not hasattr(self, "roles"):
-            return set()
+            return []
+        return [slug async for slug in self._role_slugs_queryset()]
+
+    def _role_slugs_queryset(self):
+        return (
+            self.roles.filter(role_users__user=self, role_users__is_deleted=False)
+            .order_by("slug")
+            .values_list("slug", flat=True)
+            .distinct()
+        )
+
+    def get_permission_codes(self):
+        """
+        Permission codes from all roles assigned to the user, served from the
+        versioned RBAC cache and memoized on the instance (like ModelBackend's
+        `_perm_cache`), so repeated checks within one request are free.
+        """
+        from apps.rbac.cache import get_cached_permission_codes
+
+        if not hasattr(self, "_rbac_perm_cache"):
+            self._rbac_perm_cache = get_cached_permission_codes(self)
+        return self._rbac_perm_cache
+
+    async def aget_permission_codes(self):
+        from apps.rbac.cache import aget_cached_permission_codes
+
+        if not hasattr(self, "_rbac_perm_cache"):
+            self._rbac_perm_cache = await aget_cached_permission_codes(self)
+        return self._rbac_perm_cache
+
+    def clear_permission_cache(self):
+        self.__dict__.pop("_rbac_perm_cache", None)
+
+    def resolve_permission_codes(self):
+        """
+        Compile the user's permission bitmask, bypassing the per-user cache.
+        Soft-deleted assignments, roles and permissions are ignored.
+        """
+        from apps.rbac.bitset import PermissionSet, compile_user_mask, get_catalog
 
-        permission_codes = set()
-        roles = self.roles.prefetch_related("permissions")
-        for role in roles:
-            permission_codes.update(role.permissions.values_list("code", flat=True))
-        return permission_codes
+        return PermissionSet(compile_user_mask(self), get_catalog())
 
     def has_perm_code(self, code: str) -> bool:
         return code in self.get_permission_codes()
@@ -0,0 +1,168 @@
+"""
+Keyset (cursor) pagination for the customer list.
+
+Pages are addressed by the `(ordering column, id)` key of their first or
+last row instead of an offset, so every page is an index range scan of
+`page_size` rows and page N costs the same as page 1. No total count is
+computed.
+"""
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from apps.common.pagination import parse_page_size
+
+from .filters import ORDERING_FIELDS
+
+
+def encode_cursor(ordering, row, previous=False):
+    field = ordering.lstrip("-")
+    payload = {"o": ordering, "v": row[field], "id": str(row["id"])}
+    if previous:
+        payload["p"] = 1
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(value):
+    """
+    Return the cursor payload, or None if `value` is not a cursor we issued.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if not isinstance(payload, dict) or not {"o", "v", "id"} <= payload.keys():
+        return None
+    return payload
+
+
+def keyset_order(ordering, backwards=False):
+    descending = ordering.startswith("-") != backwards
+    field = ordering.lstrip("-")
+    prefix = "-" if descending else ""
+    if field == "id":
+        return [f"{prefix}id"]
+    return [f"{prefix}{field}", f"{prefix}id"]
+
+
+def keyset_after(ordering, value, pk, backwards=False):
+    """
+    Rows strictly after `(value, pk)` in `ordering` (before it, if `backwards`).
+
+    The leading `field >= value` term gives the planner a range start on the
+    `(field, id)` index; the OR only filters rows tied on `value`.
+    """
+    descending = ordering.startswith("-") != backwards
+    field = ordering.lstrip("-")
+    cmp, cmp_eq = ("lt", "lte") if descending else ("gt", "gte")
+    if field == "id":
+        return Q(**{f"id__{cmp}": pk})
+    return Q(**{f"{field}__{cmp_eq}": value}) & (Q(**{f"{field}__{cmp}": value}) | Q(**{f"id__{cmp}": pk}))
+
+
+class CustomerCursorPagination(BasePagination):
+    """
+    Cursor pagination on `(ordering column, id)` for any single `ordering_fields` entry.
+    """
+    cursor_query_param = "cursor"
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering_fields = ORDERING_FIELDS
+    default_ordering = "first_name"
+    invalid_cursor_message = "Invalid cursor."
+
+    def get_page_size_from(self, params):
+        return parse_page_size(params, self.page_size_query_param, self.page_size, self.max_page_size)
+
+    def get_ordering(self, params):
+        for term in params.get(api_settings.ORDERING_PARAM, "").split(","):
+            term = term.strip()
+            if term.lstrip("-") in self.ordering_fields:
+                return term
+        return self.default_ordering
+
+    def get_window(self, queryset, params):
+        """
+        The unevaluated `page_size + 1` row slice for the cursor in `params`.
+        Raises NotFound for a cursor we did not issue for this ordering.
+        """
+        self.page_size = self.get_page_size_from(params)
+        self.ordering = self.get_ordering(params)
+
+        raw_cursor = params.get(self.cursor_query_param)
+        self.cursor = None
+        if raw_cursor:
+            self.cursor = decode_cursor(raw_cursor)
+            if self.cursor is None or self.cursor["o"] != self.ordering:
+                raise NotFound(self.invalid_cursor_message)
+        self.backwards = bool(self.cursor and self.cursor.get("p"))
+
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                keyset_after(self.ordering, self.cursor["v"], self.cursor["id"], self.backwards)
+            )
+        return queryset.order_by(*keyset_order(self.ordering, self.backwards))[: self.page_size + 1]
+
+    def set_page(self, rows):
+        """
+        Trim the fetched window to the page and work out its neighbours.
+        """
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if self.backwards:
+            rows.reverse()
+
+        self.has_next = has_more if not self.backwards else True
+        self.has_previous = has_more if self.backwards else self.cursor is not None
+        self.page = rows
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        return self.set_page(list(self.get_window(queryset, request.query_params)))
+
+    def _position(self, obj):
+        field = self.ordering.lstrip("-")
+        return {field: getattr(obj, field), "id": obj.pk}
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        cursor = encode_cursor(self.ordering, self._position(self.page[-1]))
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_previous_link(self):
+        if not (self.has_previous and self.page):
+            return None
+        cursor = encode_cursor(self.ordering, self._position(self.page[0]), previous=True)
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_data(self, data):
+        return {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,104 @@
+"""
+Indexed customer search over first name, last name and email.
+
+- PostgreSQL: a weighted `tsvector` expression with a GIN index (migration
+  0005); names weigh more than the email address.
+- SQLite: the `accounts_user_fts` FTS5 shadow table, kept in sync with
+  `accounts_user` by triggers (so bulk updates are covered too) and ranked
+  with bm25. See apps.accounts.fts.
+- Anything else, or SQLite with the table or a trigger missing: the
+  `icontains` ORs DRF's SearchFilter would build.
+
+Every term is matched as a prefix, so partial input works for autocomplete.
+Matches are annotated with `search_rank` (higher is better).
+"""
+import operator
+import re
+from functools import reduce
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .fts import FTS_TABLE, sqlite_fts_installed
+
+SEARCH_FIELDS = ("first_name", "last_name", "email")
+
+# Must match the index expression in migration 0005 for the GIN index to be used.
+PG_VECTOR_SQL = (
+    "(setweight(to_tsvector('simple', coalesce(\"accounts_user\".\"first_name\", '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(\"accounts_user\".\"last_name\", '')), 'A') || "
+    "setweight(to_tsvector('simple', translate(coalesce(\"accounts_user\".\"email\", ''), '@.', '  ')), 'B'))"
+)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_tokens(terms):
+    """
+    Split free-text search terms into word tokens, dropping punctuation.
+    """
+    return [token.lower() for term in terms for token in _TOKEN_RE.findall(term)]
+
+
+def _postgres_search(queryset, tokens):
+    query = " & ".join(f"{token}:*" for token in tokens)
+    return queryset.alias(
+        search_match=RawSQL(f"{PG_VECTOR_SQL} @@ to_tsquery('simple', %s)", [query], output_field=BooleanField())
+    ).filter(search_match=True).annotate(
+        search_rank=RawSQL(f"ts_rank({PG_VECTOR_SQL}, to_tsquery('simple', %s))", [query], output_field=FloatField())
+    )
+
+
+def _sqlite_search(queryset, tokens):
+    query = " ".join(f'"{token}"*' for token in tokens)
+    # Joined rather than correlated, so MATCH runs once and each hit is a pk lookup.
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f"{FTS_TABLE} MATCH %s", f'{FTS_TABLE}.user_id = "accounts_user"."id"'],
+        params=[query],
+        # bm25 is lower-is-better; column weights skip user_id and favour names over email.
+        select={"search_rank": f"-bm25({FTS_TABLE}, 0.0, 10.0, 10.0, 5.0)"},
+    )
+
+
+def _fallback_search(queryset, terms):
+    for term in terms:
+        queryset = queryset.filter(
+            reduce(operator.or_, (Q(**{f"{field}__icontains": term}) for field in SEARCH_FIELDS))
+        )
+    return queryset
+
+
+def is_ranked(queryset):
+    return "search_rank" in queryset.query.annotations or "search_rank" in queryset.query.extra
+
+
+def search_customers(queryset, terms):
+    """
+    Filter a User queryset to matches for every term in `terms`.
+    """
+    tokens = search_tokens(terms)
+    if not tokens:
+        return _fallback_search(queryset, terms)
+    if connection.vendor == "postgresql":
+        return _postgres_search(queryset, tokens)
+    if connection.vendor == "sqlite" and fts_available():
+        return _sqlite_search(queryset, tokens)
+    return _fallback_search(queryset, terms)
+
+
+_fts_available = None
+
+
+def fts_available():
+    """
+    True if the FTS table and its sync triggers are in place; without the
+    triggers the index goes stale, so search falls back to `icontains`.
+    """
+    global _fts_available
+
+    # Only a positive answer is cached, so the index is picked up once migrated.
+    if not _fts_available:
+        _fts_available = sqlite_fts_installed(connection)
+    return _fts_available
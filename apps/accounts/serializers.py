@@ -7,6 +7,7 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from .models import User
 from apps.rbac.models import Role, UserRole
+from apps.rbac.tokens import add_permission_claims
 
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -15,6 +16,7 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         token = super().get_token(user)
         token["username"] = user.username
         token["role"] = user.role
+        add_permission_claims(token, user)
         return token
 
 
@@ -161,9 +163,9 @@ class MeSerializer(serializers.ModelSerializer):
                     self.Meta.fields.append(optional_field)
 
     def get_roles(self, obj):
-        if hasattr(obj, "roles"):
-            return list(obj.roles.values_list("slug", flat=True))
-        return []
+        # Async views load the slugs beforehand and pass them in the context.
+        role_slugs = self.context.get("role_slugs")
+        return obj.get_role_slugs() if role_slugs is None else role_slugs
 
     def update(self, instance, validated_data):
         validated_data.pop("email", None)
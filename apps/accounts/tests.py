@@ -1,3 +1,301 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.rbac.models import Role, UserRole
+
+from . import search
+from .exports import astream_export, stream_export
+from .views import CustomerChangesView
+from .fts import sqlite_fts_installed
+from .models import User
+
+
+class CustomerSearchIndexTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="ada", email="ada@example.com", first_name="Ada", last_name="Admin", password="pw"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_triggers_survive_later_table_rebuilds(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite FTS index only")
+        self.assertTrue(sqlite_fts_installed(connection))
+
+    def test_user_created_after_migrations_is_searchable(self):
+        response = self.client.get("/api/customers/", {"search": "ada"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["email"], "ada@example.com")
+
+
+class CustomerSearchTests(APITestCase):
+    def setUp(self):
+        search._fts_available = None
+        self.addCleanup(setattr, search, "_fts_available", None)
+        self.viewer = User.objects.create_user(username="viewer", email="viewer@example.com", password="pw")
+        self.jonathan = User.objects.create_user(
+            username="jh", email="zed@acme.test", first_name="Jonathan", last_name="Harker", password="pw"
+        )
+        self.mina = User.objects.create_user(
+            username="mm", email="jonny@acme.test", first_name="Mina", last_name="Murray", password="pw"
+        )
+        self.client.force_authenticate(self.viewer)
+
+    def emails(self, **params):
+        response = self.client.get("/api/customers/", params)
+        self.assertEqual(response.status_code, 200)
+        return [row["email"] for row in response.data["results"]]
+
+    def test_prefix_match(self):
+        self.assertCountEqual(self.emails(search="harke"), ["zed@acme.test"])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.emails(search="jon harker"), ["zed@acme.test"])
+        self.assertEqual(self.emails(search="jon murray"), ["jonny@acme.test"])
+        self.assertEqual(self.emails(search="harker murray"), [])
+
+    def test_name_matches_rank_above_email_matches(self):
+        if connection.vendor not in ("sqlite", "postgresql"):
+            self.skipTest("ranking needs the indexed backend")
+        self.assertEqual(self.emails(search="jon"), ["zed@acme.test", "jonny@acme.test"])
+
+    def test_explicit_ordering_overrides_rank(self):
+        self.assertEqual(self.emails(search="jon", ordering="email"), ["jonny@acme.test", "zed@acme.test"])
+
+    def test_falls_back_to_icontains_without_triggers(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite FTS index only")
+        # Prefix matching cannot find a mid-word substring; icontains can.
+        self.assertEqual(self.emails(search="arke"), [])
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER accounts_user_fts_update")
+        search._fts_available = None
+        self.assertFalse(search.fts_available())
+        self.assertEqual(self.emails(search="arke"), ["zed@acme.test"])
+
+    def test_punctuation_only_terms_use_icontains(self):
+        self.assertCountEqual(
+            self.emails(search="@"), ["viewer@example.com", "zed@acme.test", "jonny@acme.test"]
+        )
+
+
+class CustomerExportTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="root", email="root@example.com", first_name="Root", password="pw"
+        )
+        self.customer = User.objects.create_user(
+            username="cu", email="cu@example.com", first_name="Cu", password="pw"
+        )
+
+    def test_requires_rbac_admin(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.get("/api/customers/export/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_streams_csv(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get("/api/customers/export/", {"ordering": "email"})
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,first_name,last_name,email")
+        self.assertEqual([line.split(",")[-1] for line in lines[1:]], ["cu@example.com", "root@example.com"])
+
+    def test_streams_asynchronously_under_asgi(self):
+        token = RefreshToken.for_user(self.admin).access_token
+
+        async def fetch():
+            response = await self.async_client.get(
+                "/api/customers/export/", {"export": "ndjson"}, headers={"Authorization": f"Bearer {token}"}
+            )
+            return response, [chunk async for chunk in response]
+
+        response, chunks = async_to_sync(fetch)()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertEqual(len(b"".join(chunks).splitlines()), 2)
+
+    def test_async_stream_matches_sync_stream(self):
+        queryset = User.objects.order_by("email")
+
+        async def collect():
+            return [line async for line in astream_export(queryset, "ndjson", chunk_size=1)]
+
+        self.assertEqual(async_to_sync(collect)(), list(stream_export(queryset, "ndjson")))
+
+    def test_command_writes_to_command_stdout(self):
+        out = StringIO()
+        call_command("export_customers", "--export", "ndjson", stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+
+@mock.patch.object(CustomerChangesView, "settle_seconds", 0)
+class CustomerChangesTests(APITestCase):
+    url = "/api/customers/changes/"
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="root", email="root@example.com", password="pw")
+        self.client.force_authenticate(self.admin)
+
+    def test_requires_rbac_admin(self):
+        customer = User.objects.create_user(username="cu", email="cu@example.com", password="pw")
+        self.client.force_authenticate(customer)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_cursor_resumes_after_last_change(self):
+        first = self.client.get(self.url).data
+        self.assertEqual([row["email"] for row in first["results"]], ["root@example.com"])
+        User.objects.create_user(username="new", email="new@example.com", password="pw")
+        second = self.client.get(self.url, {"cursor": first["cursor"]}).data
+        self.assertEqual([row["email"] for row in second["results"]], ["new@example.com"])
+
+    def test_empty_page_keeps_a_cursor(self):
+        since = self.admin.updated_at.isoformat()
+        empty = self.client.get(self.url, {"updated_since": since}).data
+        self.assertEqual(empty["results"], [])
+        self.assertIsNotNone(empty["cursor"])
+        User.objects.create_user(username="new", email="new@example.com", password="pw")
+        later = self.client.get(self.url, {"cursor": empty["cursor"]}).data
+        self.assertEqual([row["email"] for row in later["results"]], ["new@example.com"])
+        again = self.client.get(self.url, {"cursor": later["cursor"]}).data
+        self.assertEqual((again["results"], again["cursor"]), ([], later["cursor"]))
+
+
+class CustomerListParityTests(APITestCase):
+    """
+    /api/customers/ and its ASGI twin /api/async/customers/ must agree.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="viewer", email="viewer@example.com", password="pw")
+        names = [("Ada", "Lovelace"), ("Alan", "Turing"), ("Grace", "Hopper"), ("Ada", "Byron")]
+        for idx, (first, last) in enumerate(names):
+            User.objects.create_user(
+                username=f"u{idx}", email=f"u{idx}@example.com", first_name=first, last_name=last, password="pw"
+            )
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.addCleanup(cache.clear)
+
+    def fetch(self, path, params):
+        async def get():
+            response = await self.async_client.get(path, params, headers={"Authorization": f"Bearer {self.token}"})
+            return response.status_code, response.json()
+
+        return async_to_sync(get)()
+
+    def assertSameResponse(self, params):
+        sync_status, sync_body = self.fetch("/api/customers/", params)
+        async_status, async_body = self.fetch("/api/async/customers/", params)
+        self.assertEqual(sync_status, async_status)
+        for key in ("next", "previous"):
+            if key in sync_body:
+                sync_body[key] = sync_body[key] and sync_body[key].replace("/api/customers/", "/api/async/customers/")
+        self.assertEqual(sync_body, async_body)
+        return sync_body
+
+    def test_page_number_responses_match(self):
+        body = self.assertSameResponse({"page_size": 2, "page": 2})
+        self.assertEqual(body["count"], 5)
+        self.assertSameResponse({"page": "last", "page_size": 2})
+        self.assertSameResponse({"ordering": "-email", "count": "cached"})
+        self.assertSameResponse({"page": 9})
+
+    def test_search_responses_match(self):
+        self.assertSameResponse({"search": "ada"})
+        self.assertSameResponse({"search": "ada", "ordering": "last_name"})
+        self.assertSameResponse({"search": "ada", "ordering": "bogus"})
+
+    def test_cursor_responses_match(self):
+        first = self.assertSameResponse({"pagination": "cursor", "page_size": 2, "ordering": "email"})
+        cursor = first["next"].split("cursor=")[1].split("&")[0]
+        self.assertSameResponse({"cursor": cursor, "page_size": 2, "ordering": "email"})
+        self.assertSameResponse({"cursor": "garbage"})
+
+
+class MeParityTests(APITestCase):
+    def test_async_me_matches_me(self):
+        user = User.objects.create_user(username="u", email="u@example.com", first_name="U", password="pw")
+        roles = Role.objects.filter(slug__in=["admin", "customer"])
+        UserRole.objects.bulk_create(UserRole(user=user, role=role) for role in roles)
+        token = str(RefreshToken.for_user(user).access_token)
+        self.addCleanup(cache.clear)
+
+        async def get(path):
+            response = await self.async_client.get(path, headers={"Authorization": f"Bearer {token}"})
+            return response.status_code, response.json()
+
+        sync_response = async_to_sync(get)("/api/me/")
+        self.assertEqual(async_to_sync(get)("/api/async/me/"), sync_response)
+        self.assertEqual(sync_response[1]["roles"], ["admin", "customer"])
+
+
+class CustomerCursorPaginationTests(APITestCase):
+    url = "/api/customers/"
+
+    def setUp(self):
+        viewer = User.objects.create_user(username="viewer", email="viewer@example.com", first_name="Zed", password="pw")
+        self.client.force_authenticate(viewer)
+        for idx, first in enumerate(["Ada"] * 5 + ["Bob"] * 3 + ["Cy"]):
+            User.objects.create_user(username=f"u{idx}", email=f"u{idx}@example.com", first_name=first, password="pw")
+        self.addCleanup(cache.clear)
+
+    def get_page(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def walk(self, ordering):
+        forward = []
+        page = self.get_page(self.url, {"pagination": "cursor", "page_size": 2, "ordering": ordering})
+        while True:
+            forward.extend(row["id"] for row in page["results"])
+            if not page["next"]:
+                break
+            page = self.get_page(page["next"])
+        backward = []
+        while True:
+            backward[:0] = [row["id"] for row in page["results"]]
+            if not page["previous"]:
+                break
+            page = self.get_page(page["previous"])
+        return forward, backward
+
+    def test_walks_ties_forward_and_back(self):
+        for ordering in ("first_name", "-first_name"):
+            rows = User.objects.order_by(ordering, ordering.replace("first_name", "id"))
+            expected = [str(pk) for pk in rows.values_list("id", flat=True)]
+            forward, backward = self.walk(ordering)
+            self.assertEqual(forward, expected)
+            self.assertEqual(backward, expected)
+
+    def test_cursor_for_another_ordering_is_not_found(self):
+        page = self.get_page(self.url, {"pagination": "cursor", "page_size": 2, "ordering": "email"})
+        cursor = page["next"].split("cursor=")[1].split("&")[0]
+        response = self.client.get(self.url, {"cursor": cursor, "page_size": 2, "ordering": "first_name"})
+        self.assertEqual(response.status_code, 404)
+
+
+class CustomerCountModeTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="viewer", email="viewer@example.com", password="pw")
+        self.client.force_authenticate(self.user)
+        self.addCleanup(cache.clear)
+
+    def test_exact_count_by_default(self):
+        response = self.client.get("/api/customers/")
+        self.assertEqual((response.data["count"], response.data["count_type"]), (1, "exact"))
+
+    def test_cheaper_counts_are_opt_in(self):
+        response = self.client.get("/api/customers/", {"count": "cached"})
+        self.assertEqual((response.data["count"], response.data["count_type"]), (1, "cached"))
+        User.objects.create_user(username="late", email="late@example.com", password="pw")
+        self.assertEqual(self.client.get("/api/customers/", {"count": "cached"}).data["count"], 1)
+        self.assertEqual(self.client.get("/api/customers/").data["count"], 2)
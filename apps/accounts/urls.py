@@ -6,6 +6,8 @@ from .views import (
     MeView,
     ChangePasswordView,
     CustomerListView,
+    CustomerExportView,
+    CustomerChangesView,
 )
 
 urlpatterns = [
@@ -15,4 +17,6 @@ urlpatterns = [
     path("me/", MeView.as_view(), name="me"),
     path("me/change-password/", ChangePasswordView.as_view(), name="change_password"),
     path("customers/", CustomerListView.as_view(), name="customers"),
+    path("customers/export/", CustomerExportView.as_view(), name="customers_export"),
+    path("customers/changes/", CustomerChangesView.as_view(), name="customers_changes"),
 ]
@@ -1,13 +1,27 @@
+import uuid
+from datetime import timedelta, timezone as dt_timezone
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.permissions import IsAuthenticated
-from rest_framework import status, generics, filters
-from rest_framework.pagination import PageNumberPagination
+from rest_framework import status, generics
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from apps.common.http import conditional_response, make_etag
+from apps.common.pagination import CountedPageNumberPagination, parse_page_size
+from apps.rbac.cache import get_permission_version, get_user_version
+from apps.rbac.permissions import IsRBACAdmin
+
+from .exports import EXPORT_FORMATS, astream_export, stream_export
+from .filters import CustomerFilter
 from .models import User
+from .pagination import CustomerCursorPagination, decode_cursor, encode_cursor, keyset_after, keyset_order
 
 from .serializers import (
     RegisterSerializer,
@@ -18,7 +32,10 @@ from .serializers import (
 )
 
 
-class CustomerPagination(PageNumberPagination):
+MAX_UUID = uuid.UUID(int=(1 << 128) - 1)
+
+
+class CustomerPagination(CountedPageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
@@ -30,6 +47,11 @@ class CustomerSerializer(serializers.ModelSerializer):
         fields = ["id", "first_name", "last_name", "email"]
 
 
+class CustomerChangeSerializer(CustomerSerializer):
+    class Meta(CustomerSerializer.Meta):
+        fields = CustomerSerializer.Meta.fields + ["is_active", "updated_at"]
+
+
 class RegisterView(APIView):
     permission_classes = [AllowAny]
 
@@ -64,8 +86,13 @@ class MeView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        serializer = MeSerializer(request.user)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        user = request.user
+        etag = make_etag(user.pk, get_user_version(user.pk), get_permission_version())
+        return conditional_response(
+            request,
+            etag,
+            lambda: Response(MeSerializer(user).data, status=status.HTTP_200_OK),
+        )
 
     def patch(self, request):
         serializer = MeSerializer(
@@ -139,17 +166,126 @@ class LoginView(APIView):
         )
 
 
+def wants_cursor_pagination(params):
+    return "cursor" in params or params.get("pagination") == "cursor"
+
+
 class CustomerListView(generics.ListAPIView):
     """
-    Return customers (all users) with basic pagination and search by name/email.
+    Return customers (all users) with pagination and search by name/email.
+
+    Page-number pagination by default; `?pagination=cursor` (or any `cursor`
+    param) switches to keyset pagination, whose pages cost the same at any depth.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = CustomerSerializer
     pagination_class = CustomerPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["first_name", "last_name", "email"]
-    ordering_fields = ["first_name", "last_name", "email", "id"]
-    ordering = ["first_name"]
+    cursor_pagination_class = CustomerCursorPagination
+    # Shared with AsyncCustomerListView; see apps.accounts.filters.
+    filter_backends = [CustomerFilter]
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if wants_cursor_pagination(self.request.query_params):
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
 
     def get_queryset(self):
         return User.objects.all().order_by("first_name", "id")
+
+
+class CustomerExportView(CustomerListView):
+    """
+    Stream every customer matching the list's `search`/`ordering` params as
+    CSV or NDJSON (`?export=ndjson`; `format` is taken by DRF content negotiation).
+    Full-table dumps are restricted to RBAC admins.
+    """
+    permission_classes = [IsAuthenticated, IsRBACAdmin]
+    export_param = "export"
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get(self.export_param, "csv")
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"Unsupported export format. Use one of: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        content_type, _ = EXPORT_FORMATS[export_format]
+        # ASGI would buffer a sync iterator in full, so hand it an async one.
+        stream = astream_export if isinstance(request._request, ASGIRequest) else stream_export
+        response = StreamingHttpResponse(stream(queryset, export_format), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="customers.{export_format}"'
+        return response
+
+
+class CustomerChangesView(APIView):
+    """
+    Delta sync feed: customers created or changed (including deactivations)
+    since `updated_since` (ISO 8601) or since a previously returned `cursor`.
+
+    Rows are walked in `(updated_at, id)` order, so a sync fetches only what
+    changed. Rows touched in the last `settle_seconds` are held back until the
+    next call, so a slow transaction committing an older timestamp is not
+    skipped. Deleted users are not reported; deactivate them instead.
+
+    `updated_at` is stamped by the application clock when the row is saved,
+    not when it commits. A write whose transaction stays open longer than
+    `settle_seconds`, or an app server whose clock lags by more than that,
+    can still land behind a cursor that was already issued and be missed.
+    Keep `settle_seconds` above the longest transaction that writes users.
+    """
+    permission_classes = [IsAuthenticated, IsRBACAdmin]
+    serializer_class = CustomerChangeSerializer
+    ordering = "updated_at"
+    page_size = 500
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    settle_seconds = 2
+
+    def get_page_size(self, request):
+        return parse_page_size(request.query_params, self.page_size_query_param, self.page_size, self.max_page_size)
+
+    def get(self, request):
+        queryset = User.objects.filter(updated_at__lte=timezone.now() - timedelta(seconds=self.settle_seconds))
+
+        raw_cursor = request.query_params.get("cursor")
+        since = request.query_params.get("updated_since")
+        # Where the next call resumes if this page comes back empty.
+        resume_cursor = raw_cursor
+        if raw_cursor:
+            cursor = decode_cursor(raw_cursor)
+            if cursor is None or cursor["o"] != self.ordering:
+                return Response({"detail": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(keyset_after(self.ordering, cursor["v"], cursor["id"]))
+        elif since:
+            since_dt = parse_datetime(since)
+            if since_dt is None:
+                return Response(
+                    {"detail": "updated_since must be an ISO 8601 datetime."}, status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(since_dt):
+                since_dt = timezone.make_aware(since_dt, dt_timezone.utc)
+            queryset = queryset.filter(updated_at__gt=since_dt)
+            # The largest possible id makes the cursor resume strictly after `since_dt`.
+            resume_cursor = encode_cursor(self.ordering, {"updated_at": since_dt, "id": MAX_UUID})
+
+        page_size = self.get_page_size(request)
+        rows = list(queryset.order_by(*keyset_order(self.ordering))[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if rows:
+            next_cursor = encode_cursor(self.ordering, {"updated_at": rows[-1].updated_at, "id": rows[-1].pk})
+        else:
+            next_cursor = resume_cursor
+        return Response(
+            {
+                "results": self.serializer_class(rows, many=True).data,
+                "cursor": next_cursor,
+                "has_more": has_more,
+            }
+        )
@@ -0,0 +1,50 @@
+from django.http import HttpResponseNotModified, JsonResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+
+from apps.common.http import etag_matches
+
+
+class AsyncAPIView(View):
+    """
+    Minimal async counterpart of a DRF APIView restricted to authenticated
+    users: authenticates with the async JWT backend, then dispatches to async
+    handlers returning plain JSON responses.
+    """
+
+    http_method_names = ["get", "head", "options"]
+
+    def get_authenticator(self):
+        from apps.accounts.authentication import AsyncJWTAuthentication
+
+        return AsyncJWTAuthentication()
+
+    def unauthorized(self, authenticator, detail):
+        body = detail if isinstance(detail, dict) else {"detail": detail}
+        response = JsonResponse(body, status=status.HTTP_401_UNAUTHORIZED)
+        response["WWW-Authenticate"] = authenticator.authenticate_header(self.request)
+        return response
+
+    async def dispatch(self, request, *args, **kwargs):
+        authenticator = self.get_authenticator()
+        try:
+            auth = await authenticator.aauthenticate(request)
+        except AuthenticationFailed as exc:
+            return self.unauthorized(authenticator, exc.detail)
+        if auth is None:
+            return self.unauthorized(authenticator, "Authentication credentials were not provided.")
+        request.user, request.auth = auth
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def conditional_response(self, etag, build):
+        """
+        Async twin of apps.common.http.conditional_response; `build` is a coroutine function.
+        """
+        if etag_matches(self.request, etag):
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            return response
+        response = await build()
+        response["ETag"] = etag
+        return response
@@ -0,0 +1,39 @@
+import hashlib
+
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    """
+    Strong ETag from the version stamps a payload was built from.
+    """
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2).
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def not_modified(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def conditional_response(request, etag, build):
+    """
+    Return 304 when the client already holds `etag`, otherwise build the
+    response with `build()` and tag it.
+    """
+    if request.method in ("GET", "HEAD") and etag_matches(request, etag):
+        return not_modified(etag)
+    response = build()
+    response["ETag"] = etag
+    return response
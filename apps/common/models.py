@@ -3,10 +3,40 @@ import uuid
 from django.db import models
 from django.utils import timezone
 
+from .signals import queryset_updated
+
+
+def active_index(*fields, name):
+    """
+    Index over rows that are not soft-deleted (`WHERE is_deleted = false`),
+    matching the filter SoftDeleteManager adds to every query.
+    """
+    return models.Index(fields=list(fields), name=name, condition=models.Q(is_deleted=False))
+
 
 class SoftDeleteQuerySet(models.QuerySet):
+    """
+    QuerySet whose bulk writes announce themselves through `queryset_updated`,
+    since they bypass the per-instance save/delete signals.
+    """
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        queryset_updated.send(sender=self.model, queryset=self, fields=tuple(kwargs))
+        return rows
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        rows = super().bulk_update(objs, fields, batch_size=batch_size)
+        queryset_updated.send(sender=self.model, queryset=self, fields=tuple(fields))
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        queryset_updated.send(sender=self.model, queryset=self, fields=())
+        return created
+
     def delete(self):
-        return super().update(is_deleted=True, deleted_at=timezone.now())
+        return self.update(is_deleted=True, deleted_at=timezone.now())
 
     def hard_delete(self):
         return super().delete()
@@ -0,0 +1,205 @@
+"""
+Page-number pagination that can skip the exact COUNT(*).
+
+`?count=` picks how the total is obtained (default: the class's `count_mode`):
+
+- `exact`: a plain COUNT(*).
+- `cached`: COUNT(*) cached per query (model, filters, search) for
+  PAGINATION_COUNT_CACHE_TTL seconds.
+- `estimate`: the PostgreSQL planner estimate (`pg_class.reltuples` for the
+  whole table, EXPLAIN rows when filtered). Small estimates are replaced by
+  an exact count; databases without estimates fall back to `cached`.
+
+The response says which kind of count it carries in `count_type`.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+COUNT_EXACT = "exact"
+COUNT_CACHED = "cached"
+COUNT_ESTIMATE = "estimate"
+COUNT_TYPES = (COUNT_EXACT, COUNT_CACHED, COUNT_ESTIMATE)
+
+
+def parse_page_size(params, query_param, default, maximum):
+    """
+    Page size requested in `params`, capped at `maximum` (if set); `default`
+    when absent, invalid or not positive.
+    """
+    try:
+        size = int(params[query_param])
+    except (KeyError, ValueError):
+        return default
+    if size <= 0:
+        return default
+    return min(size, maximum) if maximum else size
+
+
+def _count_cache_key(queryset):
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.sha1(f"{sql}|{params!r}".encode()).hexdigest()
+    return f"pagination:count:{queryset.model._meta.label_lower}:{digest}"
+
+
+def cached_count(queryset):
+    key = _count_cache_key(queryset)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TTL)
+    return count
+
+
+def estimate_count(queryset):
+    """
+    Planner row estimate for `queryset`, or None if the database has none.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    if not queryset.query.where and not queryset.query.extra_tables:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        # reltuples is -1 until the table has been vacuumed or analyzed.
+        return row[0] if row and row[0] >= 0 else None
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def resolve_count(queryset, count_type, exact_threshold):
+    """
+    Return `(count, count_type)`, degrading `estimate` to `cached` where no
+    estimate exists and to `exact` where the estimate is small.
+    """
+    if count_type == COUNT_ESTIMATE:
+        estimate = estimate_count(queryset)
+        if estimate is None:
+            count_type = COUNT_CACHED
+        elif estimate < exact_threshold:
+            count_type = COUNT_EXACT
+        else:
+            return estimate, COUNT_ESTIMATE
+    if count_type == COUNT_CACHED:
+        return cached_count(queryset), COUNT_CACHED
+    return queryset.count(), COUNT_EXACT
+
+
+class CountedPage(Page):
+    def has_next(self):
+        # An approximate total may undercount; a full page may have a successor.
+        if self.paginator.count_type != COUNT_EXACT and len(self.object_list) == self.paginator.per_page:
+            return True
+        return super().has_next()
+
+
+class CountedPaginator(Paginator):
+    def __init__(self, object_list, per_page, count_type=COUNT_EXACT, exact_threshold=0, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.requested_count_type = count_type
+        self.exact_threshold = exact_threshold
+
+    @cached_property
+    def _resolved_count(self):
+        return resolve_count(self.object_list, self.requested_count_type, self.exact_threshold)
+
+    @cached_property
+    def count(self):
+        return self._resolved_count[0]
+
+    @property
+    def count_type(self):
+        return self._resolved_count[1]
+
+    def validate_number(self, number):
+        if self.count_type == COUNT_EXACT:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        if self.count_type == COUNT_EXACT:
+            return super().page(number)
+        # An approximate total must not clamp the slice: pages past it are
+        # fetched as usual and may simply come back empty.
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+    def _get_page(self, *args, **kwargs):
+        return CountedPage(*args, **kwargs)
+
+
+class CountedPageNumberPagination(PageNumberPagination):
+    """
+    PageNumberPagination whose total may be exact, cached or estimated.
+    """
+    count_query_param = "count"
+    count_mode = COUNT_EXACT
+    # Estimates below this are replaced by an exact COUNT(*).
+    exact_count_threshold = 10000
+
+    # The helpers below take a query-params mapping rather than a request,
+    # so async views can reuse them with a plain Django request.
+
+    def get_count_type(self, params):
+        requested = params.get(self.count_query_param)
+        return requested if requested in COUNT_TYPES else self.count_mode
+
+    def get_page_size_from(self, params):
+        if not self.page_size_query_param:
+            return self.page_size
+        return parse_page_size(params, self.page_size_query_param, self.page_size, self.max_page_size)
+
+    def get_paginator(self, queryset, page_size, params):
+        return CountedPaginator(
+            queryset,
+            page_size,
+            count_type=self.get_count_type(params),
+            exact_threshold=self.exact_count_threshold,
+        )
+
+    def get_page_number_from(self, params, paginator):
+        page_number = params.get(self.page_query_param) or 1
+        if page_number in self.last_page_strings:
+            page_number = paginator.num_pages
+        return page_number
+
+    def get_page_size(self, request):
+        return self.get_page_size_from(request.query_params)
+
+    def get_page_number(self, request, paginator):
+        return self.get_page_number_from(request.query_params, paginator)
+
+    def django_paginator_class(self, queryset, page_size):
+        return self.get_paginator(queryset, page_size, self.request.query_params)
+
+    def get_paginated_data(self, data):
+        return {
+            "count": self.page.paginator.count,
+            "count_type": self.page.paginator.count_type,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_type"] = {"type": "string", "enum": list(COUNT_TYPES)}
+        return response_schema
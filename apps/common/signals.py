@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent by SoftDeleteQuerySet after bulk writes (update, soft delete, restore,
+# bulk_create, bulk_update). Arguments: sender (model), queryset, fields.
+queryset_updated = Signal()
@@ -0,0 +1,82 @@
+"""
+Archival of soft-deleted rows.
+
+Rows soft-deleted before a cutoff are copied into ArchivedRecord (or just
+dropped) and hard-deleted from their table. Work proceeds in primary-key
+order, one bounded batch per short transaction, so it can run against a live
+database. A row that still has dependents which would cascade (e.g. a menu
+item with children) is skipped until those dependents have been purged.
+
+Permissions are never purged: `Permission.bit` is allocated past the highest
+bit of any row ever stored, so hard-deleting the newest permission would let
+its bit be handed out again while old masks may still carry it.
+"""
+from datetime import timedelta
+
+from django.core import serializers as model_serializers
+from django.db import models, transaction
+from django.utils import timezone
+
+from .cache import coalesce_version_bumps
+from .models import ArchivedRecord, Menu, MenuItem, PageRegistry, Role, RolePermission, UserRole
+
+# Link tables first, so their parents are free of dependents when their turn comes.
+ARCHIVED_MODELS = (UserRole, RolePermission, MenuItem, Role, Menu, PageRegistry)
+
+
+def _without_dependents(queryset):
+    for rel in queryset.model._meta.related_objects:
+        if rel.on_delete is models.CASCADE and (rel.one_to_many or rel.one_to_one):
+            queryset = queryset.exclude(**{f"{rel.name}__isnull": False})
+    return queryset
+
+
+def _archive(model, rows):
+    label = model._meta.label_lower
+    ArchivedRecord.objects.bulk_create(
+        ArchivedRecord(
+            model=label,
+            object_pk=str(row["pk"]),
+            data=row["fields"],
+            deleted_at=row["fields"].get("deleted_at"),
+        )
+        for row in model_serializers.serialize("python", rows)
+    )
+
+
+def purge_model(model, cutoff, archive=True, batch_size=500, progress=None):
+    """
+    Archive (or drop) rows of `model` soft-deleted before `cutoff`.
+    Returns the number of rows removed from the table.
+    """
+    candidates = _without_dependents(
+        model.all_objects.filter(is_deleted=True, deleted_at__lt=cutoff)
+    ).order_by("pk")
+    purged = 0
+    last_pk = None
+    while True:
+        batch_qs = candidates if last_pk is None else candidates.filter(pk__gt=last_pk)
+        with transaction.atomic():
+            rows = list(batch_qs.select_for_update(skip_locked=True)[:batch_size])
+            if not rows:
+                break
+            last_pk = rows[-1].pk
+            if archive:
+                _archive(model, rows)
+            model.all_objects.filter(pk__in=[row.pk for row in rows], is_deleted=True).hard_delete()
+        purged += len(rows)
+        if progress:
+            progress(model, purged)
+    return purged
+
+
+def purge_soft_deleted(older_than_days, archive=True, batch_size=500, models=ARCHIVED_MODELS, progress=None):
+    """
+    Purge every archived model; returns {model label: rows removed}.
+    """
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    results = {}
+    with coalesce_version_bumps():
+        for model in models:
+            results[model._meta.label] = purge_model(model, cutoff, archive, batch_size, progress)
+    return results
@@ -0,0 +1,225 @@
+"""
+Set-based writes to the RBAC link tables (RolePermission, UserRole).
+
+Replacements are computed as a diff against every existing link row,
+including soft-deleted ones: additions are bulk-inserted, removals are
+soft-deleted with one UPDATE and previously removed links are restored
+instead of re-inserted (which would trip `unique_together`). The whole change
+costs a constant number of queries and a single permission-version bump.
+"""
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models.functions import Now
+from rest_framework import serializers
+
+from .cache import coalesce_version_bumps
+from .models import Permission, Role, RolePermission, UserRole
+
+
+def _diff_links(existing, wanted):
+    """
+    Split link changes given `existing` {target_id: is_deleted} and the `wanted` target ids.
+    """
+    to_add = wanted - existing.keys()
+    to_restore = {target_id for target_id in wanted & existing.keys() if existing[target_id]}
+    to_remove = {target_id for target_id, deleted in existing.items() if not deleted and target_id not in wanted}
+    return to_add, to_restore, to_remove
+
+
+def _resolve(queryset, field, values, label):
+    values = set(values)
+    found = dict(queryset.filter(**{f"{field}__in": values}).values_list(field, "id"))
+    unknown = sorted(values - found.keys())
+    if unknown:
+        raise serializers.ValidationError({label: [f"Unknown {label}: {', '.join(unknown)}."]})
+    return set(found.values())
+
+
+def replace_role_permissions(role, codes):
+    """
+    Make `codes` the exact set of active permissions of `role`.
+    """
+    wanted = _resolve(Permission.objects.all(), "code", codes, "permissions")
+    links = RolePermission.all_objects.filter(role=role)
+    existing = dict(links.values_list("permission_id", "is_deleted"))
+    to_add, to_restore, to_remove = _diff_links(existing, wanted)
+
+    with transaction.atomic(), coalesce_version_bumps():
+        if to_remove:
+            links.filter(permission_id__in=to_remove).delete()
+        if to_restore:
+            links.filter(permission_id__in=to_restore).restore()
+        if to_add:
+            RolePermission.objects.bulk_create(
+                [RolePermission(role=role, permission_id=permission_id) for permission_id in to_add]
+            )
+    return {"added": len(to_add) + len(to_restore), "removed": len(to_remove)}
+
+
+def replace_user_roles(user, slugs, assigned_by=None):
+    """
+    Make `slugs` the exact set of active roles of `user`.
+
+    This also rewrites the legacy `User.role` field, which the JWT `role`
+    claim, `User.is_admin` and the customer widgets still read. It becomes
+    "admin" when `slugs` includes the admin role and "customer" otherwise.
+    The bulk grant/revoke helpers do the same for the admin role.
+    """
+    wanted = _resolve(Role.objects.all(), "slug", slugs, "roles")
+    links = UserRole.all_objects.filter(user=user)
+    existing = dict(links.values_list("role_id", "is_deleted"))
+    to_add, to_restore, to_remove = _diff_links(existing, wanted)
+
+    with transaction.atomic(), coalesce_version_bumps():
+        if to_remove:
+            links.filter(role_id__in=to_remove).delete()
+        if to_restore:
+            links.filter(role_id__in=to_restore).update(is_deleted=False, deleted_at=None, assigned_by=assigned_by)
+        if to_add:
+            UserRole.objects.bulk_create(
+                [UserRole(user=user, role_id=role_id, assigned_by=assigned_by) for role_id in to_add]
+            )
+        legacy_role = user.Roles.ADMIN if user.Roles.ADMIN in set(slugs) else user.Roles.CUSTOMER
+        if user.role != legacy_role:
+            user.role = legacy_role
+            user.save(update_fields=["role", "updated_at"])
+    user.clear_permission_cache()
+    return {"added": len(to_add) + len(to_restore), "removed": len(to_remove)}
+
+
+# Lookups accepted when selecting a user cohort by filter.
+USER_FILTERS = {
+    "is_active": "bool",
+    "is_staff": "bool",
+    "is_superuser": "bool",
+    "role": "str",
+    "email__iendswith": "str",
+    "date_joined__gte": "str",
+    "date_joined__lte": "str",
+    "last_login__gte": "str",
+    "last_login__lte": "str",
+}
+
+
+# Accepted spellings of boolean filter values.
+BOOLEAN_STRINGS = {"1": True, "true": True, "yes": True, "0": False, "false": False, "no": False}
+
+
+def _filter_value(lookup, value):
+    if isinstance(value, (list, dict)):
+        raise DjangoValidationError("Expected a single value.")
+    if USER_FILTERS[lookup] == "bool" and isinstance(value, str):
+        value = BOOLEAN_STRINGS.get(value.strip().lower(), value)
+    field = get_user_model()._meta.get_field(lookup.split("__")[0])
+    return field.to_python(value)
+
+
+def filter_users(filters):
+    """
+    Users matching whitelisted `filters` ({lookup: value}). Every value is
+    converted with its model field up front, so bad input is a ValidationError
+    rather than a database error once the queryset runs.
+    """
+    unknown = sorted(set(filters) - USER_FILTERS.keys())
+    if unknown:
+        raise serializers.ValidationError({"filters": [f"Unsupported filters: {', '.join(unknown)}."]})
+    lookups = {}
+    errors = []
+    for lookup, value in filters.items():
+        try:
+            lookups[lookup] = _filter_value(lookup, value)
+        except DjangoValidationError as exc:
+            errors.extend(f"{lookup}: {message}" for message in exc.messages)
+    if errors:
+        raise serializers.ValidationError({"filters": errors})
+    return get_user_model().objects.filter(**lookups)
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def resolve_user_ids(user_ids, chunk_size=1000):
+    """
+    Validate an explicit list of user ids before any write, raising a
+    ValidationError that lists every id with no matching user.
+    """
+    User = get_user_model()
+    wanted = []
+    unknown = []
+    for value in dict.fromkeys(user_ids):
+        try:
+            wanted.append(User._meta.pk.to_python(value))
+        except DjangoValidationError:
+            unknown.append(str(value))
+    found = set()
+    for chunk in _chunks(wanted, chunk_size):
+        found.update(User.objects.filter(pk__in=chunk).values_list("pk", flat=True))
+    unknown += [str(pk) for pk in wanted if pk not in found]
+    if unknown:
+        raise serializers.ValidationError([f"Unknown users: {', '.join(unknown)}."])
+    return wanted
+
+
+def bulk_assign_role(role, user_ids, assigned_by=None, chunk_size=1000, progress=None):
+    """
+    Grant `role` to every user id in `user_ids` (any iterable, consumed lazily).
+
+    Each chunk runs in its own short transaction: ids are resolved against
+    the user table (ids with no user are skipped), soft-deleted links are
+    restored with one UPDATE, then missing links are inserted with
+    bulk_create(ignore_conflicts=True). The permission version is bumped once
+    at the end. `progress(processed)` is called after every chunk.
+
+    The operation as a whole is not atomic: if it fails, the chunks before
+    the failure stay committed. Granting is idempotent, so the fix is to
+    re-run it. Validate explicit id lists up front with `resolve_user_ids`.
+    Returns the number of users the role was granted to.
+    """
+    User = get_user_model()
+    processed = 0
+    with coalesce_version_bumps():
+        for chunk in _chunks(user_ids, chunk_size):
+            with transaction.atomic():
+                chunk = list(User.objects.filter(pk__in=chunk).values_list("pk", flat=True))
+                UserRole.all_objects.filter(role=role, user_id__in=chunk, is_deleted=True).update(
+                    is_deleted=False, deleted_at=None, assigned_by=assigned_by
+                )
+                UserRole.objects.bulk_create(
+                    [UserRole(user_id=user_id, role=role, assigned_by=assigned_by) for user_id in chunk],
+                    ignore_conflicts=True,
+                )
+                if role.slug == User.Roles.ADMIN:
+                    User.objects.filter(pk__in=chunk).exclude(role=User.Roles.ADMIN).update(
+                        role=User.Roles.ADMIN, updated_at=Now()
+                    )
+            processed += len(chunk)
+            if progress:
+                progress(processed)
+    return processed
+
+
+def bulk_revoke_role(role, user_ids, chunk_size=1000, progress=None):
+    """
+    Revoke `role` from every user id in `user_ids` with one soft-delete UPDATE
+    per chunk and a single permission-version bump at the end.
+    """
+    User = get_user_model()
+    processed = 0
+    with coalesce_version_bumps():
+        for chunk in _chunks(user_ids, chunk_size):
+            with transaction.atomic():
+                UserRole.objects.filter(role=role, user_id__in=chunk).delete()
+                if role.slug == User.Roles.ADMIN:
+                    User.objects.filter(pk__in=chunk, role=User.Roles.ADMIN).update(
+                        role=User.Roles.CUSTOMER, updated_at=Now()
+                    )
+            processed += len(chunk)
+            if progress:
+                progress(processed)
+    return processed
@@ -0,0 +1,60 @@
+"""
+Async-native variants of the hot RBAC read endpoints, for ASGI deployments.
+
+They mirror DashboardConfigView and MePermissionsView but authenticate and
+resolve permissions through the async ORM and cache, so a single event loop
+can hold many slow clients without a thread per request.
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+
+from apps.common.async_views import AsyncAPIView
+from apps.common.http import make_etag
+
+from .cache import aget_catalog_version, aget_permission_version, aget_user_version
+from .menus import get_menu_tree_key
+from .permissions import aget_request_permission_codes, aget_request_role_slugs
+from .views import DashboardConfigMixin
+from .widgets import WIDGET_REGISTRY, arun_widgets
+
+
+class AsyncDashboardConfigView(DashboardConfigMixin, AsyncAPIView):
+    async def get_etag(self, request):
+        user = request.user
+        return make_etag(
+            user.pk,
+            await aget_user_version(user.pk),
+            await aget_permission_version(),
+            await aget_catalog_version(),
+            await sync_to_async(get_menu_tree_key)(location=self.menu_location) or "static",
+            self._widget_epoch(),
+        )
+
+    async def get(self, request):
+        return await self.conditional_response(await self.get_etag(request), self._get)
+
+    async def _get(self):
+        request = self.request
+        user = request.user
+        permission_codes = await aget_request_permission_codes(request)
+        allow_all = user.is_superuser
+        role_slugs = await aget_request_role_slugs(request)
+
+        menu_data, widget_keys = await sync_to_async(self._filtered_menu_and_widgets)(permission_codes, allow_all)
+        widgets = await arun_widgets([WIDGET_REGISTRY[key] for key in widget_keys if key in WIDGET_REGISTRY], user)
+
+        return JsonResponse(self._payload(user, role_slugs, permission_codes, menu_data, widgets))
+
+
+class AsyncMePermissionsView(AsyncAPIView):
+    async def get(self, request):
+        user = request.user
+        etag = make_etag(
+            user.pk, await aget_user_version(user.pk), await aget_permission_version(), await aget_catalog_version()
+        )
+        return await self.conditional_response(etag, self._get)
+
+    async def _get(self):
+        roles = await aget_request_role_slugs(self.request)
+        permissions = sorted(await aget_request_permission_codes(self.request))
+        return JsonResponse({"roles": roles, "permissions": permissions})
@@ -0,0 +1,255 @@
+"""
+Bitset-encoded permission sets.
+
+Every Permission owns a stable bit position (`Permission.bit`). Roles compile
+to the OR of their permissions' bits and users to the OR of their roles'
+masks, so a check is a single bit test against a plain int.
+"""
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import (
+    aget_catalog_version,
+    aget_permission_version,
+    cache_is_shared,
+    get_catalog_version,
+    get_permission_version,
+)
+
+
+class PermissionCatalog:
+    """
+    Snapshot of the permission catalog: code <-> bit mapping plus the listing
+    rows served by the catalog endpoints.
+    """
+
+    __slots__ = ("bits", "codes", "all_mask", "entries", "predicates", "_prefix_masks")
+
+    def __init__(self, bits, entries=()):
+        self.bits = bits
+        self.codes = {bit: code for code, bit in bits.items()}
+        self.all_mask = self.mask(bits)
+        self.entries = tuple(entries)
+        self.predicates = {}
+        self._prefix_masks = {}
+
+    def mask(self, codes):
+        mask = 0
+        for code in codes:
+            bit = self.bits.get(code)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def prefix_mask(self, prefix):
+        """
+        Mask of every code starting with `prefix`, memoized per snapshot.
+        """
+        mask = self._prefix_masks.get(prefix)
+        if mask is None:
+            mask = self.mask(code for code in self.bits if code.startswith(prefix))
+            self._prefix_masks[prefix] = mask
+        return mask
+
+    def decode(self, mask):
+        while mask:
+            low = mask & -mask
+            code = self.codes.get(low.bit_length() - 1)
+            if code is not None:
+                yield code
+            mask ^= low
+
+    @classmethod
+    def load(cls):
+        from .models import Permission
+
+        # Listing rows carry every PermissionSerializer field.
+        fields = ("id", "code", "module", "action", "description", "bit", "created_at", "updated_at")
+        entries = list(Permission.objects.values(*fields))
+        if any(entry["bit"] is None for entry in entries):
+            Permission.assign_missing_bits()
+            entries = list(Permission.objects.values(*fields))
+        bits = {entry["code"]: entry["bit"] for entry in entries if entry["bit"] is not None}
+        for entry in entries:
+            del entry["bit"]
+        return cls(bits, entries)
+
+
+class PermissionSet:
+    """
+    Immutable, set-like view over a permission bitmask.
+    """
+
+    __slots__ = ("mask", "catalog")
+
+    def __init__(self, mask, catalog):
+        self.mask = mask
+        self.catalog = catalog
+
+    def __contains__(self, code):
+        bit = self.catalog.bits.get(code)
+        return bit is not None and (self.mask >> bit) & 1 == 1
+
+    def __iter__(self):
+        return self.catalog.decode(self.mask)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __bool__(self):
+        return bool(self.mask & self.catalog.all_mask)
+
+    def __repr__(self):
+        return f"<PermissionSet {sorted(self)!r}>"
+
+    def allows_any(self, codes):
+        return bool(self.mask & self.catalog.mask(codes))
+
+    def allows_all(self, codes):
+        return all(code in self for code in codes)
+
+    def matching(self, pattern):
+        """
+        Codes held that match `pattern`; `module.*` matches the whole module.
+        """
+        if pattern.endswith(".*"):
+            return list(self.catalog.decode(self.mask & self.catalog.prefix_mask(pattern[:-1])))
+        return [pattern] if pattern in self else []
+
+
+EMPTY_PERMISSION_SET = PermissionSet(0, PermissionCatalog({}))
+
+
+_catalog_snapshot = None
+
+
+def _fresh_snapshot(version):
+    snapshot = _catalog_snapshot
+    if snapshot is None:
+        return None
+    snapshot_version, loaded_at, catalog = snapshot
+    if snapshot_version == version and time.monotonic() - loaded_at < settings.RBAC_CATALOG_TTL:
+        return catalog
+    return None
+
+
+def _store_snapshot(version, catalog):
+    global _catalog_snapshot
+
+    _catalog_snapshot = (version, time.monotonic(), catalog)
+    return catalog
+
+
+def get_catalog():
+    """
+    Process-wide catalog snapshot, reloaded when the catalog version moves on
+    or after RBAC_CATALOG_TTL seconds, whichever comes first.
+    """
+    version = get_catalog_version()
+    catalog = _fresh_snapshot(version)
+    if catalog is None:
+        catalog = _store_snapshot(version, PermissionCatalog.load())
+    return catalog
+
+
+async def aget_catalog():
+    version = await aget_catalog_version()
+    catalog = _fresh_snapshot(version)
+    if catalog is None:
+        catalog = _store_snapshot(version, await sync_to_async(PermissionCatalog.load)())
+    return catalog
+
+
+def refresh_catalog():
+    global _catalog_snapshot
+
+    _catalog_snapshot = None
+    return get_catalog()
+
+
+def _role_masks_query():
+    from .models import RolePermission
+
+    return RolePermission.objects.filter(
+        role__is_deleted=False,
+        permission__is_deleted=False,
+        permission__bit__isnull=False,
+    ).values_list("role_id", "permission__bit")
+
+
+def _add_role_bit(masks, role_id, bit):
+    masks[role_id] = masks.get(role_id, 0) | (1 << bit)
+
+
+def _load_role_masks():
+    masks = {}
+    for role_id, bit in _role_masks_query():
+        _add_role_bit(masks, role_id, bit)
+    return masks
+
+
+async def _aload_role_masks():
+    masks = {}
+    async for role_id, bit in _role_masks_query():
+        _add_role_bit(masks, role_id, bit)
+    return masks
+
+
+def get_role_masks():
+    """
+    Compiled bitmask per active role id, shared by every user holding the role.
+    Only cached when the cache is shared between workers (see cache_is_shared).
+    """
+    if not cache_is_shared():
+        return _load_role_masks()
+    key = f"rbac:role_masks:{get_permission_version()}"
+    masks = cache.get(key)
+    if masks is None:
+        masks = _load_role_masks()
+        cache.set(key, masks, settings.RBAC_PERMISSION_CACHE_TIMEOUT)
+    return masks
+
+
+async def aget_role_masks():
+    if not cache_is_shared():
+        return await _aload_role_masks()
+    key = f"rbac:role_masks:{await aget_permission_version()}"
+    masks = await cache.aget(key)
+    if masks is None:
+        masks = await _aload_role_masks()
+        await cache.aset(key, masks, settings.RBAC_PERMISSION_CACHE_TIMEOUT)
+    return masks
+
+
+def _user_role_ids(user):
+    from .models import UserRole
+
+    return UserRole.objects.filter(user=user, role__is_deleted=False).values_list("role_id", flat=True)
+
+
+def compile_user_mask(user):
+    """
+    OR of the compiled masks of the user's active roles; superusers get every bit.
+    """
+    if getattr(user, "is_superuser", False):
+        return get_catalog().all_mask
+
+    role_masks = get_role_masks()
+    mask = 0
+    for role_id in _user_role_ids(user):
+        mask |= role_masks.get(role_id, 0)
+    return mask
+
+
+async def acompile_user_mask(user):
+    if getattr(user, "is_superuser", False):
+        return (await aget_catalog()).all_mask
+
+    role_masks = await aget_role_masks()
+    mask = 0
+    async for role_id in _user_role_ids(user):
+        mask |= role_masks.get(role_id, 0)
+    return mask
@@ -0,0 +1,180 @@
+"""
+Version-stamped caching for RBAC lookups.
+
+Cached entries embed the current version of what they were computed from in
+their key; bumping the version orphans every entry at once, so invalidation
+never has to enumerate keys.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+PERMISSION_VERSION = "permissions"
+CATALOG_VERSION = "catalog"
+
+_local = threading.local()
+
+
+def cache_is_shared():
+    """
+    Whether every worker process sees the same cache (RBAC_SHARED_CACHE, or
+    any backend except locmem/dummy when unset).
+
+    A version bump only reaches processes sharing the cache, so cached
+    permission sets are bypassed when it is process-local: otherwise a
+    revocation made in one worker would keep working in the others until the
+    cached entries expire.
+    """
+    shared = settings.RBAC_SHARED_CACHE
+    if shared is None:
+        shared = not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+    return shared
+
+
+def _version_key(name):
+    return f"rbac:version:{name}"
+
+
+def get_version(name):
+    """
+    Return the current version stamp for `name`, seeding it if missing.
+
+    Stamps are seeded from the clock rather than 1 so that a cache flush or
+    restart can never hand out a stamp that was already in use.
+    """
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(name):
+    key = _version_key(name)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def _bump_now(name):
+    key = _version_key(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, None)
+        return version
+
+
+def bump_version(name):
+    """
+    Bump `name` once the current transaction commits, so no request can cache
+    pre-commit data under the new stamp. Inside coalesce_version_bumps() the
+    bump is collected and applied once when the block exits.
+    """
+    pending = getattr(_local, "pending", None)
+    if pending is not None:
+        pending.add(name)
+        return
+    transaction.on_commit(partial(_bump_now, name))
+
+
+@contextmanager
+def coalesce_version_bumps():
+    """
+    Collapse every version bump made inside the block into one per name.
+    """
+    if getattr(_local, "pending", None) is not None:
+        yield
+        return
+    _local.pending = set()
+    try:
+        yield
+    finally:
+        pending, _local.pending = _local.pending, None
+        for name in pending:
+            bump_version(name)
+
+
+def get_permission_version():
+    return get_version(PERMISSION_VERSION)
+
+
+async def aget_permission_version():
+    return await aget_version(PERMISSION_VERSION)
+
+
+def bump_permission_version():
+    return bump_version(PERMISSION_VERSION)
+
+
+def get_catalog_version():
+    return get_version(CATALOG_VERSION)
+
+
+async def aget_catalog_version():
+    return await aget_version(CATALOG_VERSION)
+
+
+def bump_catalog_version():
+    return bump_version(CATALOG_VERSION)
+
+
+def get_user_version(user_pk):
+    return get_version(f"user:{user_pk}")
+
+
+async def aget_user_version(user_pk):
+    return await aget_version(f"user:{user_pk}")
+
+
+def bump_user_version(user_pk):
+    return bump_version(f"user:{user_pk}")
+
+
+def _user_permissions_key(user, version):
+    return "rbac:user_permissions:{}:{}:{}".format(
+        user.pk,
+        int(bool(getattr(user, "is_superuser", False))),
+        version,
+    )
+
+
+def get_cached_permission_codes(user):
+    """
+    Return the user's permissions as a PermissionSet, compiling the bitmask
+    from the database only when the permission version has moved on.
+    """
+    from .bitset import PermissionSet, compile_user_mask, get_catalog
+
+    if not cache_is_shared():
+        return PermissionSet(compile_user_mask(user), get_catalog())
+    key = _user_permissions_key(user, get_permission_version())
+    mask = cache.get(key)
+    if mask is None:
+        mask = compile_user_mask(user)
+        cache.set(key, mask, settings.RBAC_PERMISSION_CACHE_TIMEOUT)
+    return PermissionSet(mask, get_catalog())
+
+
+async def aget_cached_permission_codes(user):
+    from .bitset import PermissionSet, acompile_user_mask, aget_catalog
+
+    if not cache_is_shared():
+        return PermissionSet(await acompile_user_mask(user), await aget_catalog())
+    key = _user_permissions_key(user, await aget_permission_version())
+    mask = await cache.aget(key)
+    if mask is None:
+        mask = await acompile_user_mask(user)
+        await cache.aset(key, mask, settings.RBAC_PERMISSION_CACHE_TIMEOUT)
+    return PermissionSet(mask, await aget_catalog())
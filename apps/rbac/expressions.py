@@ -0,0 +1,139 @@
+"""
+Permission expressions stored in `MenuItem.permission` / `PageRegistry.permission`.
+
+    null                      always allowed
+    "hotels.view"             holds the code
+    "hotels.*"                holds any code of the module
+    ["a.view", "b.*"]         any of (shorthand for {"any": [...]})
+    {"any": [expr, ...]}      at least one sub-expression holds
+    {"all": [expr, ...]}      every sub-expression holds
+    {"not": expr}             the sub-expression does not hold
+
+Expressions are compiled into predicates over a permission bitmask. Compiled
+predicates are memoized on the catalog snapshot they were compiled against,
+keyed by the expression's canonical JSON, so an edited row simply maps to a
+new entry and a catalog reload drops them all. Callers that evaluate the same
+expression repeatedly precompute that key once (see `expression_key`).
+
+Writes are validated by the serializers, but a row stored before validation
+existed may still hold an invalid expression. It compiles to a predicate
+that always denies, and a warning is logged once per catalog.
+"""
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+CODE_RE = re.compile(r"^[A-Za-z0-9_\-]+(\.[A-Za-z0-9_\-]+)*(\.\*)?$")
+MAX_DEPTH = 10
+
+
+class PermissionExpressionError(ValueError):
+    pass
+
+
+def _always(mask):
+    return True
+
+
+def _never(mask):
+    return False
+
+
+def validate_expression(expr, depth=0):
+    if depth > MAX_DEPTH:
+        raise PermissionExpressionError("Permission expression is nested too deeply.")
+    if expr is None:
+        if depth:
+            raise PermissionExpressionError("null is only allowed as the whole expression.")
+        return
+    if isinstance(expr, str):
+        if not CODE_RE.match(expr):
+            raise PermissionExpressionError(f"Invalid permission code '{expr}'.")
+        return
+    if isinstance(expr, (list, tuple)):
+        if not expr:
+            raise PermissionExpressionError("Permission arrays must not be empty.")
+        for item in expr:
+            validate_expression(item, depth + 1)
+        return
+    if isinstance(expr, dict):
+        if len(expr) != 1:
+            raise PermissionExpressionError("Permission objects must have exactly one of 'any', 'all' or 'not'.")
+        (op, operand), = expr.items()
+        if op in ("any", "all"):
+            if not isinstance(operand, (list, tuple)) or not operand:
+                raise PermissionExpressionError(f"'{op}' expects a non-empty array.")
+            for item in operand:
+                validate_expression(item, depth + 1)
+            return
+        if op == "not":
+            validate_expression(operand, depth + 1)
+            return
+        raise PermissionExpressionError(f"Unknown permission operator '{op}'.")
+    raise PermissionExpressionError("Permission must be null, a string, an array or an object.")
+
+
+def _leaf_mask(code, catalog):
+    if code.endswith(".*"):
+        return catalog.prefix_mask(code[:-1])
+    return catalog.mask((code,))
+
+
+def _compile(expr, catalog):
+    if expr is None:
+        return _always
+    if isinstance(expr, str):
+        required = _leaf_mask(expr, catalog)
+        return lambda mask: mask & required != 0
+    if isinstance(expr, (list, tuple)):
+        expr = {"any": expr}
+    (op, operand), = expr.items()
+    if op == "not":
+        inner = _compile(operand, catalog)
+        return lambda mask: not inner(mask)
+
+    # Plain codes/wildcards fold into one mask: a single AND for "any",
+    # a single compare per leaf for "all".
+    leaves = [_leaf_mask(item, catalog) for item in operand if isinstance(item, str)]
+    nested = tuple(_compile(item, catalog) for item in operand if not isinstance(item, str))
+    if op == "any":
+        combined = 0
+        for leaf in leaves:
+            combined |= leaf
+        if not nested:
+            return lambda mask: mask & combined != 0
+        return lambda mask: mask & combined != 0 or any(pred(mask) for pred in nested)
+    leaves = tuple(leaves)
+    return lambda mask: all(mask & leaf != 0 for leaf in leaves) and all(pred(mask) for pred in nested)
+
+
+def expression_key(expr):
+    return json.dumps(expr, sort_keys=True, separators=(",", ":"))
+
+
+def compile_expression(expr, catalog, key=None):
+    """
+    Predicate `mask -> bool` for `expr`, memoized on `catalog`. Invalid
+    expressions deny.
+    """
+    if expr is None:
+        return _always
+    if key is None:
+        key = expression_key(expr)
+    predicate = catalog.predicates.get(key)
+    if predicate is None:
+        try:
+            validate_expression(expr)
+        except PermissionExpressionError as exc:
+            logger.warning("Invalid permission expression %s denies access: %s", key, exc)
+            predicate = _never
+        else:
+            predicate = _compile(expr, catalog)
+        catalog.predicates[key] = predicate
+    return predicate
+
+
+def expression_allows(user_permissions, expr, key=None):
+    return compile_expression(expr, user_permissions.catalog, key)(user_permissions.mask)
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+
+from apps.rbac.assignments import bulk_assign_role, bulk_revoke_role, filter_users, resolve_user_ids
+from apps.rbac.models import Role
+
+
+class Command(BaseCommand):
+    help = "Grant or revoke a role for many users at once, in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--role", required=True, help="Role slug.")
+        parser.add_argument("--revoke", action="store_true", help="Revoke instead of grant.")
+        parser.add_argument("--ids", help="Comma-separated user ids.")
+        parser.add_argument("--ids-file", help="File with one user id per line.")
+        parser.add_argument(
+            "--filter",
+            action="append",
+            default=[],
+            metavar="LOOKUP=VALUE",
+            help="User filter, e.g. is_active=true or email__iendswith=@example.com (repeatable).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def _user_ids(self, options):
+        ids = None
+        if options["ids"]:
+            ids = [value.strip() for value in options["ids"].split(",") if value.strip()]
+        elif options["ids_file"]:
+            with open(options["ids_file"]) as handle:
+                ids = [line.strip() for line in handle if line.strip()]
+        if ids is not None:
+            try:
+                return resolve_user_ids(ids, chunk_size=options["chunk_size"])
+            except serializers.ValidationError as exc:
+                raise CommandError(" ".join(exc.detail))
+        filters = {}
+        for item in options["filter"]:
+            lookup, sep, value = item.partition("=")
+            if not sep:
+                raise CommandError(f"Invalid filter '{item}', expected LOOKUP=VALUE.")
+            filters[lookup.strip()] = value.strip()
+        try:
+            users = filter_users(filters)
+        except serializers.ValidationError as exc:
+            raise CommandError(" ".join(exc.detail["filters"]))
+        return users.values_list("pk", flat=True).iterator(chunk_size=options["chunk_size"])
+
+    def handle(self, *args, **options):
+        try:
+            role = Role.objects.get(slug=options["role"])
+        except Role.DoesNotExist:
+            raise CommandError(f"Role '{options['role']}' does not exist.")
+
+        def progress(processed):
+            self.stdout.write(f"  {processed} users processed")
+
+        user_ids = self._user_ids(options)
+        if options["revoke"]:
+            processed = bulk_revoke_role(role, user_ids, chunk_size=options["chunk_size"], progress=progress)
+            verb = "Revoked"
+        else:
+            processed = bulk_assign_role(role, user_ids, chunk_size=options["chunk_size"], progress=progress)
+            verb = "Granted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} role '{role.slug}' for {processed} users."))
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.rbac.archive import purge_soft_deleted
+
+
+class Command(BaseCommand):
+    help = "Archive (or hard-delete) RBAC rows soft-deleted more than N days ago, in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.RBAC_SOFT_DELETE_RETENTION_DAYS,
+            help="Only rows deleted more than this many days ago.",
+        )
+        parser.add_argument("--no-archive", action="store_true", help="Hard-delete without keeping an archive copy.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        def progress(model, purged):
+            self.stdout.write(f"  {model._meta.label}: {purged}")
+
+        results = purge_soft_deleted(
+            options["days"],
+            archive=not options["no_archive"],
+            batch_size=options["batch_size"],
+            progress=progress,
+        )
+        verb = "Deleted" if options["no_archive"] else "Archived"
+        total = sum(results.values())
+        self.stdout.write(self.style.SUCCESS(f"{verb} {total} soft-deleted rows."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.rbac.menus import needs_rebalance, rebalance_siblings
+from apps.rbac.models import MenuItem
+
+
+class Command(BaseCommand):
+    help = "Respace MenuItem.sort_order ranks in sibling groups that have run out of gaps."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Respace every sibling group, not only exhausted ones.")
+
+    def handle(self, *args, **options):
+        groups = {}
+        for menu_id, parent_id, rank in MenuItem.objects.order_by("menu_id", "parent_id", "sort_order", "id").values_list(
+            "menu_id", "parent_id", "sort_order"
+        ):
+            groups.setdefault((menu_id, parent_id), []).append(rank)
+
+        rebalanced = 0
+        for (menu_id, parent_id), ranks in groups.items():
+            if options["all"] or needs_rebalance(ranks):
+                rebalance_siblings(menu_id, parent_id)
+                rebalanced += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebalanced {rebalanced} of {len(groups)} sibling groups."))
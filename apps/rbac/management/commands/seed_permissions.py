@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 
+from apps.rbac.bitset import refresh_catalog
 from apps.rbac.models import Permission, Role
 
 
@@ -11,4 +12,6 @@ class Command(BaseCommand):
         Permission.objects.all().delete()
         Role.objects.all().delete()
 
+        catalog = refresh_catalog()
         self.stdout.write(self.style.SUCCESS("Permissions and roles cleared (disabled)."))
+        self.stdout.write(f"Permission catalog now holds {len(catalog.bits)} codes.")
@@ -0,0 +1,305 @@
+"""
+Menu trees assembled from Menu/MenuItem rows.
+
+A tree is fetched with one query, linked in memory and cached. Cache keys
+carry the global menu version (bumped on Menu writes and bulk MenuItem
+writes) plus a per-menu version (bumped on single MenuItem writes), so edits
+show up on the next request.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, F, PositiveIntegerField, Q, Value, When
+
+from .cache import bump_version, get_version
+from .expressions import expression_key
+from .models import SORT_ORDER_GAP, Menu, MenuItem
+
+MENUS_VERSION = "menus"
+
+
+class MenuOrderError(ValueError):
+    """
+    Rejected reorder or move; `field` names the offending part of the request.
+    """
+
+    def __init__(self, message, field="order"):
+        super().__init__(message)
+        self.field = field
+
+
+ITEM_FIELDS = (
+    "id",
+    "parent_id",
+    "key",
+    "label",
+    "link_type",
+    "path",
+    "url",
+    "icon",
+    "permission",
+)
+
+
+def _menu_version_name(menu_id):
+    return f"menu:{menu_id}"
+
+
+def get_menus_version():
+    return get_version(MENUS_VERSION)
+
+
+def bump_menus_version():
+    return bump_version(MENUS_VERSION)
+
+
+def get_menu_version(menu_id):
+    return get_version(_menu_version_name(menu_id))
+
+
+def bump_menu_version(menu_id):
+    return bump_version(_menu_version_name(menu_id))
+
+
+def get_menu_ids(slug=None, location=None):
+    """
+    Ids of the active menus matching `slug` or `location`, cached per menus version.
+    """
+    key = f"rbac:menu_ids:{slug or ''}:{location or ''}:{get_menus_version()}"
+    menu_ids = cache.get(key)
+    if menu_ids is None:
+        qs = Menu.objects.filter(is_active=True)
+        if slug is not None:
+            qs = qs.filter(slug=slug)
+        if location is not None:
+            qs = qs.filter(location=location)
+        menu_ids = list(qs.order_by("name", "id").values_list("id", flat=True))
+        cache.set(key, menu_ids, settings.RBAC_PERMISSION_CACHE_TIMEOUT)
+    return menu_ids
+
+
+def _node(row):
+    permission = row["permission"]
+    node = {
+        "key": row["key"],
+        "label": row["label"],
+        "path": row["path"],
+        "permission": permission,
+        # Canonical expression key, computed once per cached tree; not part of the API output.
+        "permission_key": None if permission is None else expression_key(permission),
+        "icon": row["icon"],
+    }
+    if row["link_type"] == MenuItem.LinkTypes.EXTERNAL:
+        node["url"] = row["url"]
+    return node
+
+
+def _assemble(menu_ids):
+    """
+    Fetch every active item of `menu_ids` in one query and link parents to children.
+    Items whose parent is inactive or deleted are dropped with it.
+    """
+    rows = (
+        MenuItem.objects.filter(menu_id__in=menu_ids, is_active=True)
+        .order_by("sort_order", "id")
+        .values("menu_id", *ITEM_FIELDS)
+    )
+    menu_position = {menu_id: idx for idx, menu_id in enumerate(menu_ids)}
+    rows = sorted(rows, key=lambda row: menu_position[row["menu_id"]])
+
+    nodes = {row["id"]: _node(row) for row in rows}
+    roots = []
+    for row in rows:
+        node = nodes[row["id"]]
+        if row["parent_id"] is None:
+            roots.append(node)
+            continue
+        parent = nodes.get(row["parent_id"])
+        if parent is not None:
+            parent.setdefault("children", []).append(node)
+    return roots
+
+
+def _menu_tree_key(menu_ids):
+    versions = [str(get_menus_version())] + [str(get_menu_version(menu_id)) for menu_id in menu_ids]
+    return "rbac:menu_tree:{}:{}".format(",".join(map(str, menu_ids)), ",".join(versions))
+
+
+def get_menu_tree_key(slug=None, location=None):
+    """
+    Cache key identifying the current version of a menu tree, or None when no
+    active menu matches. Doubles as a fingerprint for output derived from it.
+    """
+    menu_ids = get_menu_ids(slug=slug, location=location)
+    return _menu_tree_key(menu_ids) if menu_ids else None
+
+
+def build_menu_tree(slug=None, location=None):
+    """
+    Menu tree for the menu with `slug`, or for every menu at `location`.
+    None when no active menu matches; an empty list when menus exist but
+    none of their items are active.
+    """
+    menu_ids = get_menu_ids(slug=slug, location=location)
+    if not menu_ids:
+        return None
+    key = _menu_tree_key(menu_ids)
+    tree = cache.get(key)
+    if tree is None:
+        tree = _assemble(menu_ids)
+        cache.set(key, tree, settings.RBAC_PERMISSION_CACHE_TIMEOUT)
+    return tree
+
+
+def _sibling_ranks(menu_id, parent_id):
+    return list(
+        MenuItem.objects.filter(menu_id=menu_id, parent_id=parent_id)
+        .order_by("sort_order", "id")
+        .values_list("id", "sort_order")
+    )
+
+
+def _bulk_set_ranks(ranks, parents=None):
+    """
+    Write `{item_id: sort_order}` (and optionally `{item_id: parent_id}`) in a single UPDATE.
+    """
+    updates = {
+        "sort_order": Case(
+            *(When(pk=pk, then=Value(rank)) for pk, rank in ranks.items()),
+            output_field=PositiveIntegerField(),
+        )
+    }
+    if parents:
+        updates["parent_id"] = Case(
+            *(When(pk=pk, then=Value(parent_id)) for pk, parent_id in parents.items()),
+            default=F("parent_id"),
+            output_field=BigIntegerField(),
+        )
+    return MenuItem.objects.filter(pk__in=list(ranks)).update(**updates)
+
+
+def rebalance_siblings(menu_id, parent_id):
+    """
+    Respace one sibling group to SORT_ORDER_GAP multiples, keeping its order.
+    """
+    siblings = _sibling_ranks(menu_id, parent_id)
+    ranks = {pk: (idx + 1) * SORT_ORDER_GAP for idx, (pk, _) in enumerate(siblings)}
+    if any(ranks[pk] != rank for pk, rank in siblings):
+        _bulk_set_ranks(ranks)
+    return ranks
+
+
+def needs_rebalance(ranks):
+    """
+    True when some neighbouring ranks have no room left between them.
+    """
+    previous = 0
+    for rank in ranks:
+        if rank - previous < 2:
+            return True
+        previous = rank
+    return False
+
+
+def apply_order(menu, order):
+    """
+    Apply a complete new ordering in one transaction and one UPDATE.
+
+    `order` lists `{"id": ..., "parent": ...}` entries in display order;
+    `parent` is optional and defaults to the item's current parent. Every
+    sibling group an entry lands in must be listed in full, since each such
+    group is renumbered in SORT_ORDER_GAP steps from the top. Groups that
+    only lose items keep their ranks. Raises MenuOrderError.
+    """
+    ids = [entry["id"] for entry in order]
+    if len(set(ids)) != len(ids):
+        raise MenuOrderError("Duplicate item ids.")
+
+    moved_parents = {entry["id"]: entry["parent"] for entry in order if "parent" in entry}
+    lookup_ids = set(ids) | {parent_id for parent_id in moved_parents.values() if parent_id is not None}
+    items = {
+        row["id"]: row
+        for row in MenuItem.objects.filter(menu=menu, pk__in=lookup_ids).values("id", "parent_id")
+    }
+    missing = sorted(set(lookup_ids) - set(items))
+    if missing:
+        raise MenuOrderError(f"Items not found in this menu: {missing}.")
+
+    final_parents = {pk: moved_parents.get(pk, items[pk]["parent_id"]) for pk in items}
+    nested = [pk for pk, parent_id in moved_parents.items() if parent_id is not None]
+    for pk in nested:
+        parent_id = moved_parents[pk]
+        if parent_id == pk or final_parents[parent_id] is not None:
+            raise MenuOrderError("Only two levels are allowed (parent + child).", field="parent")
+    if nested and MenuItem.objects.filter(parent_id__in=nested).exclude(pk__in=moved_parents).exists():
+        raise MenuOrderError("Items with children cannot be nested.", field="parent")
+
+    groups = {final_parents[pk] for pk in ids}
+    in_groups = Q(parent_id__in=[parent_id for parent_id in groups if parent_id is not None])
+    if None in groups:
+        in_groups |= Q(parent__isnull=True)
+    unlisted = sorted(
+        MenuItem.objects.filter(in_groups, menu=menu).exclude(pk__in=ids).values_list("id", flat=True)
+    )
+    if unlisted:
+        raise MenuOrderError(f"Each reordered sibling group must be listed in full; missing items: {unlisted}.")
+
+    positions = {}
+    ranks = {}
+    for pk in ids:
+        parent_id = final_parents[pk]
+        positions[parent_id] = positions.get(parent_id, 0) + 1
+        ranks[pk] = positions[parent_id] * SORT_ORDER_GAP
+
+    with transaction.atomic():
+        _bulk_set_ranks(ranks, parents=moved_parents)
+    return ranks
+
+
+def move_item(item, before=None, after=None):
+    """
+    Place `item` between its siblings `after` and `before` (ids, either may be
+    None), rewriting only its own row unless the gap is exhausted, in which
+    case the sibling group is rebalanced first. Raises MenuOrderError.
+    """
+    with transaction.atomic():
+        siblings = [
+            (pk, rank) for pk, rank in _sibling_ranks(item.menu_id, item.parent_id) if pk != item.pk
+        ]
+        sibling_ranks = dict(siblings)
+        for neighbour in (before, after):
+            if neighbour is not None and neighbour not in sibling_ranks:
+                raise MenuOrderError(f"Item {neighbour} is not a sibling.", field="detail")
+        if before is not None and after is not None:
+            position = {pk: idx for idx, (pk, _) in enumerate(siblings)}
+            if position[after] >= position[before]:
+                raise MenuOrderError(f"Item {after} does not sort before item {before}.", field="detail")
+
+        def bounds():
+            if after is not None:
+                low = sibling_ranks[after]
+                following = [rank for _, rank in siblings if rank > low]
+                high = sibling_ranks[before] if before is not None else (following[0] if following else None)
+            elif before is not None:
+                high = sibling_ranks[before]
+                preceding = [rank for _, rank in siblings if rank < high]
+                low = preceding[-1] if preceding else 0
+            else:
+                low, high = (siblings[-1][1] if siblings else 0), None
+            return low, high
+
+        low, high = bounds()
+        if high is None:
+            rank = low + SORT_ORDER_GAP
+        elif high - low < 2:
+            sibling_ranks = rebalance_siblings(item.menu_id, item.parent_id)
+            sibling_ranks.pop(item.pk, None)
+            siblings = sorted(sibling_ranks.items(), key=lambda pair: pair[1])
+            low, high = bounds()
+            rank = (low + high) // 2 if high is not None else low + SORT_ORDER_GAP
+        else:
+            rank = (low + high) // 2
+
+        MenuItem.objects.filter(pk=item.pk).update(sort_order=rank)
+    item.sort_order = rank
+    return rank
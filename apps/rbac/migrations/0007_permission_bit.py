@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+def assign_bits(apps, schema_editor):
+    Permission = apps.get_model("rbac", "Permission")
+    for bit, permission in enumerate(Permission.objects.order_by("id")):
+        permission.bit = bit
+        permission.save(update_fields=["bit"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rbac", "0006_menu_rework"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="permission",
+            name="bit",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.RunPython(assign_bits, reverse_code=migrations.RunPython.noop),
+    ]
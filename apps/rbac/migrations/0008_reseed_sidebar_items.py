@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# 0006 dropped the page_registry link the seeded sidebar items relied on,
+# leaving placeholder rows ("Item", no key/path). Replace them with the
+# entries the dashboard has been serving from MENU_STATIC so the menu can be
+# read from the database without changing what users see.
+SIDEBAR_ITEMS = [
+    ("dashboard", "Dashboard", "/dashboard", "Home"),
+    ("settings", "Settings", "/settings", "Settings"),
+    ("customers", "Customers", "/customers", "Users"),
+]
+
+
+def reseed_sidebar(apps, schema_editor):
+    Menu = apps.get_model("rbac", "Menu")
+    MenuItem = apps.get_model("rbac", "MenuItem")
+
+    for menu in Menu.objects.filter(location="sidebar"):
+        items = MenuItem.objects.filter(menu=menu)
+        if items.exclude(key__isnull=True, label="Item").exists():
+            continue
+        items.delete()
+        for idx, (key, label, path, icon) in enumerate(SIDEBAR_ITEMS, start=1):
+            MenuItem.objects.create(
+                menu=menu,
+                key=key,
+                label=label,
+                link_type="INTERNAL",
+                path=path,
+                icon=icon,
+                permission=None,
+                sort_order=idx,
+                is_active=True,
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rbac", "0007_permission_bit"),
+    ]
+
+    operations = [
+        migrations.RunPython(reseed_sidebar, reverse_code=migrations.RunPython.noop),
+    ]
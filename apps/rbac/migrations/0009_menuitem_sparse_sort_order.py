@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+SORT_ORDER_GAP = 1024
+
+
+def respace_sort_order(apps, schema_editor):
+    MenuItem = apps.get_model("rbac", "MenuItem")
+    groups = {}
+    for item in MenuItem.objects.order_by("menu_id", "parent_id", "sort_order", "id"):
+        position = groups.get((item.menu_id, item.parent_id), 0) + 1
+        groups[(item.menu_id, item.parent_id)] = position
+        item.sort_order = position * SORT_ORDER_GAP
+        item.save(update_fields=["sort_order"])
+
+
+def compact_sort_order(apps, schema_editor):
+    MenuItem = apps.get_model("rbac", "MenuItem")
+    groups = {}
+    for item in MenuItem.objects.order_by("menu_id", "parent_id", "sort_order", "id"):
+        position = groups.get((item.menu_id, item.parent_id), 0) + 1
+        groups[(item.menu_id, item.parent_id)] = position
+        item.sort_order = position
+        item.save(update_fields=["sort_order"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rbac", "0008_reseed_sidebar_items"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="menuitem",
+            name="sort_order",
+            field=models.PositiveIntegerField(db_index=True, default=SORT_ORDER_GAP),
+        ),
+        migrations.RunPython(respace_sort_order, reverse_code=compact_sort_order),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations, models
+
+# Every query through SoftDeleteManager filters on is_deleted = false, so the
+# hot lookups are indexed over active rows only.
+ACTIVE = models.Q(("is_deleted", False))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rbac", "0009_menuitem_sparse_sort_order"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pageregistry",
+            index=models.Index(condition=ACTIVE, fields=["key"], name="rbac_page_key_active_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="menu",
+            index=models.Index(condition=ACTIVE, fields=["slug"], name="rbac_menu_slug_active_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="menu",
+            index=models.Index(condition=ACTIVE, fields=["location"], name="rbac_menu_loc_active_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="permission",
+            index=models.Index(condition=ACTIVE, fields=["code"], name="rbac_perm_code_active_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="role",
+            index=models.Index(condition=ACTIVE, fields=["slug"], name="rbac_role_slug_active_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="userrole",
+            index=models.Index(condition=ACTIVE, fields=["user", "role"], name="rbac_userrole_user_active_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="rolepermission",
+            index=models.Index(condition=ACTIVE, fields=["role", "permission"], name="rbac_roleperm_role_active_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="menuitem",
+            index=models.Index(condition=ACTIVE, fields=["menu", "sort_order"], name="rbac_item_menu_active_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="menuitem",
+            index=models.Index(condition=ACTIVE, fields=["parent", "sort_order"], name="rbac_item_parent_active_idx"),
+        ),
+    ]
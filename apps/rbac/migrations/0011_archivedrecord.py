@@ -0,0 +1,27 @@
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rbac", "0010_soft_delete_partial_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedRecord",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("model", models.CharField(max_length=100)),
+                ("object_pk", models.CharField(max_length=64)),
+                ("data", models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ("deleted_at", models.DateTimeField(blank=True, null=True)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ("-archived_at",),
+                "indexes": [models.Index(fields=["model", "object_pk"], name="rbac_archiv_model_0ab279_idx")],
+            },
+        ),
+    ]
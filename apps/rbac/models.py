@@ -1,7 +1,16 @@
 from django.conf import settings
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
+from django.db.models import Max
 
-from apps.common.models import SoftDeleteModel
+from apps.common.models import SoftDeleteModel, active_index
+
+# MenuItem.sort_order values are spaced this far apart so an item can be moved
+# between two siblings by rewriting only its own row.
+SORT_ORDER_GAP = 1024
+
+# Times a Permission.bit claim is retried after losing a race for the same bit.
+BIT_CLAIM_ATTEMPTS = 5
 
 class PageRegistry(SoftDeleteModel):
     class Types(models.TextChoices):
@@ -19,6 +28,9 @@ class PageRegistry(SoftDeleteModel):
 
     class Meta:
         ordering = ("title",)
+        indexes = [
+            active_index("key", name="rbac_page_key_active_idx"),
+        ]
 
     def __str__(self):
         return self.key
@@ -32,6 +44,10 @@ class Menu(SoftDeleteModel):
 
     class Meta:
         ordering = ("name",)
+        indexes = [
+            active_index("slug", name="rbac_menu_slug_active_idx"),
+            active_index("location", name="rbac_menu_loc_active_idx"),
+        ]
 
     def __str__(self):
         return self.location
@@ -42,13 +58,54 @@ class Permission(SoftDeleteModel):
     module = models.CharField(max_length=100)
     action = models.CharField(max_length=100)
     description = models.CharField(max_length=255, blank=True)
+    # Stable position of this permission in compiled role/user bitmasks; never reused.
+    bit = models.PositiveIntegerField(unique=True, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ("module", "action")
+        indexes = [
+            active_index("code", name="rbac_perm_code_active_idx"),
+        ]
 
     def __str__(self):
         return self.code
 
+    def save(self, *args, **kwargs):
+        if self.bit is None and not self._state.adding:
+            # The row may have been given a bit since it was loaded.
+            self.bit = Permission.claim_bit(self.pk)
+        super().save(*args, **kwargs)
+        if self.bit is None:
+            self.bit = Permission.claim_bit(self.pk)
+
+    @classmethod
+    def claim_bit(cls, pk):
+        """
+        Give permission `pk` the next free bit unless it already has one, and
+        return its bit. The unique constraint arbitrates concurrent claims; the
+        loser retries against the new maximum.
+        """
+        for _ in range(BIT_CLAIM_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    last_bit = cls.all_objects.aggregate(last=Max("bit"))["last"]
+                    bit = 0 if last_bit is None else last_bit + 1
+                    if cls.all_objects.filter(pk=pk, bit__isnull=True).update(bit=bit):
+                        return bit
+                    return cls.all_objects.filter(pk=pk).values_list("bit", flat=True).first()
+            except IntegrityError:
+                continue
+        raise IntegrityError(f"Could not claim a bit for permission {pk}.")
+
+    @classmethod
+    def assign_missing_bits(cls):
+        """
+        Claim bits for permissions saved without one (bulk_create and data
+        migrations skip save()).
+        """
+        for pk in cls.all_objects.filter(bit__isnull=True).order_by("pk").values_list("pk", flat=True):
+            cls.claim_bit(pk)
+
 
 class Role(SoftDeleteModel):
     name = models.CharField(max_length=100)
@@ -70,10 +127,35 @@ class Role(SoftDeleteModel):
 
     class Meta:
         ordering = ("name",)
+        indexes = [
+            active_index("slug", name="rbac_role_slug_active_idx"),
+        ]
 
     def __str__(self):
         return self.slug
 
+    @staticmethod
+    def permission_codes_prefetch():
+        """
+        Prefetch the active permission links of many roles in one query; consumed by `get_permission_codes`.
+        """
+        return models.Prefetch(
+            "role_permissions",
+            queryset=RolePermission.objects.filter(permission__is_deleted=False)
+            .select_related("permission")
+            .order_by("permission__code"),
+            to_attr="active_role_permissions",
+        )
+
+    def get_permission_codes(self):
+        if "active_role_permissions" in self.__dict__:
+            return [link.permission.code for link in self.active_role_permissions]
+        return list(
+            self.permissions.filter(permission_roles__role=self, permission_roles__is_deleted=False)
+            .order_by("code")
+            .values_list("code", flat=True)
+        )
+
 
 class UserRole(SoftDeleteModel):
     user = models.ForeignKey(
@@ -98,6 +180,9 @@ class UserRole(SoftDeleteModel):
     class Meta:
         unique_together = ("user", "role")
         ordering = ("-assigned_at",)
+        indexes = [
+            active_index("user", "role", name="rbac_userrole_user_active_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user} -> {self.role}"
@@ -119,6 +204,9 @@ class RolePermission(SoftDeleteModel):
     class Meta:
         unique_together = ("role", "permission")
         ordering = ("-created_at",)
+        indexes = [
+            active_index("role", "permission", name="rbac_roleperm_role_active_idx"),
+        ]
 
     def __str__(self):
         return f"{self.role.slug}:{self.permission.code}"
@@ -139,14 +227,43 @@ class MenuItem(SoftDeleteModel):
     url = models.URLField(blank=True, null=True)
     icon = models.CharField(max_length=100, blank=True, null=True)
     permission = models.JSONField(null=True, blank=True)
-    sort_order = models.PositiveIntegerField(default=1, db_index=True)
+    sort_order = models.PositiveIntegerField(default=SORT_ORDER_GAP, db_index=True)
     is_active = models.BooleanField(default=True, db_index=True)
 
     class Meta:
         ordering = ("sort_order", "id")
         indexes = [
             models.Index(fields=["menu", "parent", "sort_order"]),
+            active_index("menu", "sort_order", name="rbac_item_menu_active_idx"),
+            active_index("parent", "sort_order", name="rbac_item_parent_active_idx"),
         ]
 
     def __str__(self):
         return f"{self.label} ({self.menu.slug})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the cache invalidation also bump the menu an item is moved out of.
+        instance._loaded_menu_id = instance.__dict__.get("menu_id")
+        return instance
+
+
+class ArchivedRecord(models.Model):
+    """
+    Snapshot of a soft-deleted row moved out of its hot table by `purge_soft_deleted`.
+    """
+    model = models.CharField(max_length=100)
+    object_pk = models.CharField(max_length=64)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-archived_at",)
+        indexes = [
+            models.Index(fields=["model", "object_pk"]),
+        ]
+
+    def __str__(self):
+        return f"{self.model}:{self.object_pk}"
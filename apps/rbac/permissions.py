@@ -1,5 +1,60 @@
 from rest_framework.permissions import BasePermission
 
+from .bitset import EMPTY_PERMISSION_SET
+from .tokens import aget_token_permissions, aget_token_roles, get_token_permissions, get_token_roles
+
+
+def get_request_permission_codes(request):
+    """
+    Effective permission codes for the requesting user, computed at most once
+    per request (the set is memoized on `request.user`).
+
+    A current permission claim in the access token is used as-is; otherwise
+    the set is resolved through the user's cached lookup.
+    """
+    user = getattr(request, "user", None)
+    if not (user and user.is_authenticated):
+        return EMPTY_PERMISSION_SET
+    if not hasattr(user, "_rbac_perm_cache"):
+        token_permissions = get_token_permissions(getattr(request, "auth", None), user)
+        if token_permissions is not None:
+            user._rbac_perm_cache = token_permissions
+    return user.get_permission_codes()
+
+
+def get_request_role_slugs(request):
+    """
+    Role slugs for the requesting user, preferring a current token claim.
+    """
+    user = getattr(request, "user", None)
+    if not (user and user.is_authenticated):
+        return []
+    roles = get_token_roles(getattr(request, "auth", None), user)
+    if roles is None:
+        roles = user.get_role_slugs()
+    return roles
+
+
+async def aget_request_permission_codes(request):
+    user = getattr(request, "user", None)
+    if not (user and user.is_authenticated):
+        return EMPTY_PERMISSION_SET
+    if not hasattr(user, "_rbac_perm_cache"):
+        token_permissions = await aget_token_permissions(getattr(request, "auth", None), user)
+        if token_permissions is not None:
+            user._rbac_perm_cache = token_permissions
+    return await user.aget_permission_codes()
+
+
+async def aget_request_role_slugs(request):
+    user = getattr(request, "user", None)
+    if not (user and user.is_authenticated):
+        return []
+    roles = await aget_token_roles(getattr(request, "auth", None), user)
+    if roles is None:
+        roles = await user.aget_role_slugs()
+    return roles
+
 
 class HasPermCode(BasePermission):
     """
@@ -11,8 +66,7 @@ class HasPermCode(BasePermission):
         required_code = getattr(view, "required_permission_code", None)
         if required_code is None:
             return True
-        user = request.user
-        return bool(user and user.is_authenticated and user.has_perm_code(required_code))
+        return required_code in get_request_permission_codes(request)
 
 
 class IsRBACAdmin(BasePermission):
@@ -21,7 +75,7 @@ class IsRBACAdmin(BasePermission):
     """
 
     def has_permission(self, request, view):
-        return False  # roles/permissions disabled
+        return "rbac.manage_roles" in get_request_permission_codes(request)
 
 
 class IsMenuAdmin(BasePermission):
@@ -30,7 +84,10 @@ class IsMenuAdmin(BasePermission):
     """
 
     def has_permission(self, request, view):
-        return False  # menu admin disabled
+        user = request.user
+        if not (user and user.is_authenticated):
+            return False
+        return user.is_superuser or "admin" in get_request_role_slugs(request)
 
 
 class AdminCanManageMenu(BasePermission):
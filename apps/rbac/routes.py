@@ -0,0 +1,154 @@
+"""
+Path -> PageRegistry route index.
+
+Active PageRegistry rows are compiled into a segment trie, so resolving a
+path walks one node per segment instead of scanning the table. Registry
+paths may contain parameter segments (`:id`, `{id}`, `<id>` or `<int:id>`)
+and end in `*` to match every path below a prefix. At each level a static
+segment wins over a parameter without backtracking, and a path that runs
+off the trie falls back to the deepest prefix route passed on the way, so a
+lookup is linear in the path depth whatever the registry contains.
+
+The compiled index is kept per process and rebuilt when the registry
+version moves on (bumped on any PageRegistry write).
+"""
+from .cache import bump_version, get_version
+from .expressions import expression_key
+
+PAGES_VERSION = "pages"
+
+WILDCARD = "*"
+
+
+def get_pages_version():
+    return get_version(PAGES_VERSION)
+
+
+def bump_pages_version():
+    return bump_version(PAGES_VERSION)
+
+
+def split_path(path):
+    return [segment for segment in (path or "").split("/") if segment]
+
+
+def _param_name(segment):
+    if segment.startswith(":"):
+        return segment[1:]
+    if segment[0] + segment[-1] in ("{}", "<>"):
+        return segment[1:-1].rpartition(":")[2]
+    return None
+
+
+class PageRoute:
+    __slots__ = ("key", "title", "path", "type", "permission", "permission_key", "param_names")
+
+    def __init__(self, key, title, path, type, permission):
+        self.key = key
+        self.title = title
+        self.path = path
+        self.type = type
+        self.permission = permission
+        self.permission_key = None if permission is None else expression_key(permission)
+        # Routes sharing a trie node may name the same parameter differently,
+        # so names live on the route and are applied to the matched values.
+        self.param_names = tuple(name for name in map(_param_name, split_path(path)) if name is not None)
+
+    def bind(self, values):
+        return dict(zip(self.param_names, values))
+
+
+class _Node:
+    __slots__ = ("children", "param", "route", "prefix_route")
+
+    def __init__(self):
+        self.children = {}
+        self.param = None
+        self.route = None
+        self.prefix_route = None
+
+
+class RouteIndex:
+    """
+    Segment trie over registry paths; `match(path)` returns `(route, params)` or None.
+    """
+
+    def __init__(self, routes=()):
+        self.root = _Node()
+        self.size = 0
+        for route in routes:
+            self.add(route)
+
+    @classmethod
+    def load(cls):
+        from .models import PageRegistry
+
+        rows = PageRegistry.objects.filter(is_active=True).order_by("id").values_list(
+            "key", "title", "path", "type", "permission"
+        )
+        return cls(PageRoute(*row) for row in rows)
+
+    def add(self, route):
+        node = self.root
+        segments = split_path(route.path)
+        prefix = bool(segments) and segments[-1] == WILDCARD
+        if prefix:
+            segments.pop()
+        for segment in segments:
+            if _param_name(segment) is None:
+                node = node.children.setdefault(segment, _Node())
+                continue
+            if node.param is None:
+                node.param = _Node()
+            node = node.param
+        # The first registered row wins when two rows share a path.
+        if prefix:
+            node.prefix_route = node.prefix_route or route
+        else:
+            node.route = node.route or route
+        self.size += 1
+
+    def match(self, path):
+        node = self.root
+        values = []
+        fallback = None
+        for segment in split_path(path):
+            if node.prefix_route is not None:
+                fallback = (node.prefix_route, len(values))
+            child = node.children.get(segment)
+            if child is None and node.param is not None:
+                child = node.param
+                values.append(segment)
+            if child is None:
+                break
+            node = child
+        else:
+            route = node.route or node.prefix_route
+            if route is not None:
+                return route, route.bind(values)
+        if fallback is None:
+            return None
+        route, bound = fallback
+        return route, route.bind(values[:bound])
+
+
+_index_snapshot = None
+
+
+def get_route_index():
+    """
+    Process-wide route index, rebuilt when the registry version moves on.
+    """
+    global _index_snapshot
+
+    version = get_pages_version()
+    snapshot = _index_snapshot
+    if snapshot is not None and snapshot[0] == version:
+        return snapshot[1]
+    index = RouteIndex.load()
+    _index_snapshot = (version, index)
+    return index
+
+
+def resolve_page(path):
+    return get_route_index().match(path)
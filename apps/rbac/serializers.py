@@ -3,6 +3,8 @@ from django.utils.text import slugify
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
+from .assignments import resolve_user_ids
+from .expressions import PermissionExpressionError, validate_expression
 from .models import Permission, Role, MenuItem, PageRegistry, Menu
 
 
@@ -36,7 +38,7 @@ class RoleSerializer(serializers.ModelSerializer):
         ]
 
     def get_permissions(self, obj):
-        return list(obj.permissions.values_list("code", flat=True))
+        return obj.get_permission_codes()
 
 
 class RoleCreateUpdateSerializer(serializers.ModelSerializer):
@@ -63,6 +65,29 @@ class RoleCreateUpdateSerializer(serializers.ModelSerializer):
         return normalized
 
 
+class RolePermissionsReplaceSerializer(serializers.Serializer):
+    permissions = serializers.ListField(child=serializers.CharField(max_length=150), allow_empty=True)
+
+
+class UserRolesReplaceSerializer(serializers.Serializer):
+    roles = serializers.ListField(child=serializers.SlugField(), allow_empty=True)
+
+
+class RoleBulkAssignmentSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=["assign", "revoke"])
+    user_ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+    filters = serializers.DictField(required=False, allow_empty=False)
+    chunk_size = serializers.IntegerField(required=False, min_value=1, max_value=10000, default=1000)
+
+    def validate_user_ids(self, value):
+        return resolve_user_ids(value)
+
+    def validate(self, attrs):
+        if ("user_ids" in attrs) == ("filters" in attrs):
+            raise serializers.ValidationError("Provide exactly one of 'user_ids' or 'filters'.")
+        return attrs
+
+
 class UserBasicSerializer(serializers.ModelSerializer):
     roles = serializers.SerializerMethodField()
 
@@ -78,7 +103,7 @@ class UserBasicSerializer(serializers.ModelSerializer):
         ]
 
     def get_roles(self, obj):
-        return list(obj.roles.values_list("slug", flat=True))
+        return obj.get_role_slugs()
 
 
 class MenuItemSerializer(serializers.ModelSerializer):
@@ -117,13 +142,10 @@ class MenuItemSerializer(serializers.ModelSerializer):
             attrs["path"] = None
 
         # permission validation
-        perm = attrs.get("permission")
-        if perm is not None and not isinstance(perm, (str, list, tuple)):
-            raise serializers.ValidationError({"permission": "Permission must be null, string, or array."})
-        if isinstance(perm, (list, tuple)):
-            for p in perm:
-                if not isinstance(p, str):
-                    raise serializers.ValidationError({"permission": "Permission array must contain strings."})
+        try:
+            validate_expression(attrs.get("permission"))
+        except PermissionExpressionError as exc:
+            raise serializers.ValidationError({"permission": str(exc)})
 
         if parent and parent.parent:
             raise serializers.ValidationError({"parent": "Only two levels are allowed (parent + child)."})
@@ -132,7 +154,7 @@ class MenuItemSerializer(serializers.ModelSerializer):
 
 class MenuItemReorderSerializer(serializers.Serializer):
     order = serializers.ListField(
-        child=serializers.DictField(child=serializers.IntegerField()),
+        child=serializers.DictField(child=serializers.IntegerField(allow_null=True)),
         allow_empty=False,
     )
 
@@ -143,6 +165,11 @@ class MenuItemReorderSerializer(serializers.Serializer):
         return value
 
 
+class MenuItemMoveSerializer(serializers.Serializer):
+    before = serializers.IntegerField(required=False, allow_null=True)
+    after = serializers.IntegerField(required=False, allow_null=True)
+
+
 class PageRegistrySerializer(serializers.ModelSerializer):
     class Meta:
         model = PageRegistry
@@ -157,6 +184,13 @@ class PageRegistrySerializer(serializers.ModelSerializer):
             "is_active",
         ]
 
+    def validate_permission(self, value):
+        try:
+            validate_expression(value)
+        except PermissionExpressionError as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
+
 
 class MenuSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.common.signals import queryset_updated
+
+from .cache import bump_catalog_version, bump_permission_version, bump_user_version
+from .menus import bump_menu_version, bump_menus_version
+from .models import Menu, MenuItem, PageRegistry, Permission, Role, RolePermission, UserRole
+from .routes import bump_pages_version
+
+PERMISSION_MODELS = (Permission, Role, RolePermission, UserRole)
+
+
+def invalidate_permissions(sender, **kwargs):
+    bump_permission_version()
+    if sender is Permission:
+        bump_catalog_version()
+
+
+# Connected per model: a sender-less post_delete receiver would disable
+# fast deletes for every model in the project.
+for model in PERMISSION_MODELS:
+    for signal in (post_save, post_delete, queryset_updated):
+        signal.connect(invalidate_permissions, sender=model)
+
+
+@receiver(m2m_changed, sender=RolePermission)
+@receiver(m2m_changed, sender=UserRole)
+def invalidate_permissions_on_m2m(sender, action, **kwargs):
+    if action.startswith("post_"):
+        bump_permission_version()
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+def invalidate_menu(sender, instance, **kwargs):
+    bump_menu_version(instance.menu_id)
+    previous = getattr(instance, "_loaded_menu_id", None)
+    if previous is not None and previous != instance.menu_id:
+        bump_menu_version(previous)
+    instance._loaded_menu_id = instance.menu_id
+
+
+@receiver(post_save, sender=Menu)
+@receiver(post_delete, sender=Menu)
+def invalidate_menus(sender, **kwargs):
+    bump_menus_version()
+
+
+@receiver(queryset_updated, sender=Menu)
+@receiver(queryset_updated, sender=MenuItem)
+def invalidate_menus_on_bulk_write(sender, **kwargs):
+    bump_menus_version()
+
+
+@receiver(post_save, sender=PageRegistry)
+@receiver(post_delete, sender=PageRegistry)
+@receiver(queryset_updated, sender=PageRegistry)
+def invalidate_pages(sender, **kwargs):
+    bump_pages_version()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user(sender, instance, **kwargs):
+    bump_user_version(instance.pk)
@@ -0,0 +1,793 @@
+from datetime import timedelta
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models.signals import post_delete
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from apps.accounts.serializers import MyTokenObtainPairSerializer
+from apps.common.models import SoftDeleteQuerySet
+
+from .bitset import PermissionCatalog, PermissionSet, get_catalog
+from .cache import (
+    PERMISSION_VERSION,
+    bump_permission_version,
+    cache_is_shared,
+    coalesce_version_bumps,
+    get_version,
+)
+from .expressions import expression_allows
+from .menus import build_menu_tree
+from .models import ArchivedRecord, Menu, MenuItem, Permission, Role, RolePermission, UserRole
+from .permissions import HasPermCode, IsRBACAdmin, get_request_permission_codes
+from .routes import PageRoute, RouteIndex
+from .serializers import PermissionSerializer
+from .tokens import PERMISSIONS_CLAIM, VERSION_CLAIM
+from .views import PermissionCheckView
+from .widgets import Widget, arun_widgets, run_widgets
+
+
+class SoftDeleteIndexTests(TestCase):
+    def assertUsesIndex(self, queryset, index_name):
+        if connection.vendor == "postgresql":
+            # Tiny test tables are otherwise always seq-scanned.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        self.assertIn(index_name, queryset.explain())
+
+    def test_user_roles_use_partial_index(self):
+        self.assertUsesIndex(UserRole.objects.filter(user_id=1), "rbac_userrole_user_active_idx")
+
+    def test_role_permissions_use_partial_index(self):
+        self.assertUsesIndex(RolePermission.objects.filter(role_id=1), "rbac_roleperm_role_active_idx")
+
+    def test_menu_items_use_partial_indexes(self):
+        self.assertUsesIndex(MenuItem.objects.filter(menu_id=1), "rbac_item_menu_active_idx")
+        self.assertUsesIndex(MenuItem.objects.filter(parent_id=1), "rbac_item_parent_active_idx")
+
+
+class SoftDeletedGrantTests(TestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create_user(username="u", email="u@example.com", password="pw")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.role = Role.objects.create(name="Keeper", slug="keeper")
+            self.permission = Permission.objects.create(code="zoo.feed", module="zoo", action="feed")
+            self.link = RolePermission.objects.create(role=self.role, permission=self.permission)
+            self.assignment = UserRole.objects.create(user=self.user, role=self.role)
+
+    def can_feed(self):
+        return get_user_model().objects.get(pk=self.user.pk).has_perm_code("zoo.feed")
+
+    def assertSoftDeleteRevokes(self, obj):
+        self.assertTrue(self.can_feed())
+        with self.captureOnCommitCallbacks(execute=True):
+            obj.delete()
+        self.assertFalse(self.can_feed())
+        self.assertNotIn("zoo.feed", self.user.resolve_permission_codes())
+
+    def test_soft_deleted_assignment_revokes(self):
+        self.assertSoftDeleteRevokes(self.assignment)
+
+    def test_soft_deleted_role_revokes(self):
+        self.assertSoftDeleteRevokes(self.role)
+
+    def test_soft_deleted_role_permission_revokes(self):
+        self.assertSoftDeleteRevokes(self.link)
+
+    def test_soft_deleted_permission_revokes(self):
+        self.assertSoftDeleteRevokes(self.permission)
+
+
+class RequestPermissionMemoTests(TestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create_user(username="u", email="u@example.com", password="pw")
+
+    def make_request(self):
+        request = APIRequestFactory().get("/")
+        force_authenticate(request, get_user_model().objects.get(pk=self.user.pk))
+        return Request(request)
+
+    def test_second_check_in_a_request_runs_no_queries(self):
+        request = self.make_request()
+        view = mock.Mock(required_permission_code="zoo.feed")
+        self.assertFalse(HasPermCode().has_permission(request, view))
+        with self.assertNumQueries(0):
+            self.assertFalse(IsRBACAdmin().has_permission(request, view))
+            self.assertFalse(get_request_permission_codes(request))
+
+    def test_each_request_resolves_afresh(self):
+        get_request_permission_codes(self.make_request())
+        request = self.make_request()
+        with CaptureQueriesContext(connection) as queries:
+            get_request_permission_codes(request)
+        self.assertGreater(len(queries), 0)
+
+
+class PermissionBitsetTests(TestCase):
+    def setUp(self):
+        self.catalog = PermissionCatalog({"zoo.feed": 0, "zoo.clean": 3, "farm.feed": 5})
+
+    def test_permission_set_tests_bits(self):
+        permissions = PermissionSet(0b100001, self.catalog)
+        self.assertIn("zoo.feed", permissions)
+        self.assertNotIn("zoo.clean", permissions)
+        self.assertNotIn("zoo.unknown", permissions)
+        self.assertEqual(sorted(permissions), ["farm.feed", "zoo.feed"])
+        self.assertEqual(len(permissions), 2)
+        self.assertTrue(permissions.allows_any(["zoo.clean", "farm.feed"]))
+        self.assertFalse(permissions.allows_all(["zoo.clean", "farm.feed"]))
+
+    def test_unknown_bits_are_ignored(self):
+        permissions = PermissionSet(1 << 9, self.catalog)
+        self.assertFalse(permissions)
+        self.assertEqual(list(permissions), [])
+
+    def test_wildcard_matches_module(self):
+        permissions = PermissionSet(self.catalog.all_mask, self.catalog)
+        self.assertCountEqual(permissions.matching("zoo.*"), ["zoo.feed", "zoo.clean"])
+        self.assertEqual(permissions.matching("farm.feed"), ["farm.feed"])
+        self.assertEqual(PermissionSet(0, self.catalog).matching("zoo.*"), [])
+
+    def test_new_permissions_get_fresh_bits(self):
+        first = Permission.objects.create(code="zoo.feed", module="zoo", action="feed")
+        first.delete()
+        second = Permission.objects.create(code="zoo.clean", module="zoo", action="clean")
+        self.assertGreater(second.bit, first.bit)
+        second.description = "Clean"
+        second.save()
+        second.refresh_from_db()
+        self.assertIsNotNone(second.bit)
+
+    def test_bulk_created_permissions_get_bits_on_catalog_load(self):
+        superuser = get_user_model().objects.create_superuser(username="root", email="root@example.com", password="pw")
+        with self.captureOnCommitCallbacks(execute=True):
+            Permission.objects.bulk_create([Permission(code="bulk.view", module="bulk", action="view")])
+        self.assertTrue(superuser.has_perm_code("bulk.view"))
+        self.assertIsNotNone(Permission.objects.get(code="bulk.view").bit)
+
+    def test_claim_retries_after_losing_a_race(self):
+        taken = Permission.objects.create(code="zoo.feed", module="zoo", action="feed")
+        Permission.objects.bulk_create([Permission(code="zoo.clean", module="zoo", action="clean")])
+        pending = Permission.objects.get(code="zoo.clean")
+        aggregate = SoftDeleteQuerySet.aggregate
+        stale = iter([{"last": taken.bit - 1}])
+
+        def racing_aggregate(queryset, *args, **kwargs):
+            # The first read misses `taken`, as if it committed concurrently.
+            return next(stale, None) or aggregate(queryset, *args, **kwargs)
+
+        with mock.patch.object(SoftDeleteQuerySet, "aggregate", racing_aggregate):
+            self.assertEqual(Permission.claim_bit(pending.pk), taken.bit + 1)
+
+
+class PermissionVersionTests(TestCase):
+    def test_bumps_after_commit(self):
+        before = get_version(PERMISSION_VERSION)
+        with self.captureOnCommitCallbacks(execute=True):
+            Role.objects.create(name="Editor", slug="editor")
+            self.assertEqual(get_version(PERMISSION_VERSION), before)
+        self.assertGreater(get_version(PERMISSION_VERSION), before)
+
+    def test_no_bump_on_rollback(self):
+        before = get_version(PERMISSION_VERSION)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Role.objects.create(name="Editor", slug="editor")
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(get_version(PERMISSION_VERSION), before)
+
+    def test_coalesces_bumps(self):
+        before = get_version(PERMISSION_VERSION)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with coalesce_version_bumps():
+                for slug in ("a", "b", "c"):
+                    Role.objects.create(name=slug, slug=slug)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(get_version(PERMISSION_VERSION), before + 1)
+
+    def test_unrelated_models_keep_fast_delete(self):
+        self.assertFalse(post_delete.has_listeners(ArchivedRecord))
+
+
+class PermissionCacheSharingTests(TestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create_user(username="u", email="u@example.com", password="pw")
+        with self.captureOnCommitCallbacks(execute=True):
+            role = Role.objects.create(name="Keeper", slug="keeper")
+            permission = Permission.objects.create(code="zoo.feed", module="zoo", action="feed")
+            RolePermission.objects.create(role=role, permission=permission)
+            UserRole.objects.create(user=self.user, role=role)
+
+    def can_feed(self):
+        return get_user_model().objects.get(pk=self.user.pk).has_perm_code("zoo.feed")
+
+    def revoke_elsewhere(self):
+        # Another worker's write: its version bump never reaches this process.
+        UserRole.objects.filter(user=self.user).update(is_deleted=True)
+
+    @override_settings(RBAC_SHARED_CACHE=None)
+    def test_locmem_is_not_shared(self):
+        self.assertFalse(cache_is_shared())
+
+    def test_process_local_cache_reads_through(self):
+        self.assertTrue(self.can_feed())
+        self.revoke_elsewhere()
+        self.assertFalse(self.can_feed())
+
+    @override_settings(RBAC_SHARED_CACHE=True)
+    def test_shared_cache_serves_until_version_bump(self):
+        self.assertTrue(self.can_feed())
+        self.revoke_elsewhere()
+        self.assertTrue(self.can_feed())
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_permission_version()
+        self.assertFalse(self.can_feed())
+
+
+class TokenPermissionClaimTests(APITestCase):
+    url = "/api/rbac/me/permissions/check/"
+
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create_user(username="u", email="u@example.com", password="pw")
+        with self.captureOnCommitCallbacks(execute=True):
+            role = Role.objects.create(name="Keeper", slug="keeper")
+            permission = Permission.objects.create(code="zoo.feed", module="zoo", action="feed")
+            RolePermission.objects.create(role=role, permission=permission)
+            self.link = UserRole.objects.create(user=self.user, role=role)
+
+    def can_feed(self, token):
+        response = self.client.get(self.url, {"code": "zoo.feed"}, HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.status_code, 200)
+        return response.data["allowed"]
+
+    def access_token(self):
+        return MyTokenObtainPairSerializer.get_token(self.user).access_token
+
+    def revoke_elsewhere(self):
+        # Another worker's write: its version bump never reaches this process.
+        UserRole.objects.filter(pk=self.link.pk).update(is_deleted=True)
+
+    @override_settings(RBAC_SHARED_CACHE=True)
+    def test_current_claim_is_trusted(self):
+        token = self.access_token()
+        self.revoke_elsewhere()
+        self.assertTrue(self.can_feed(token))
+
+    @override_settings(RBAC_SHARED_CACHE=True)
+    def test_stale_claim_falls_back_to_live_lookup(self):
+        token = self.access_token()
+        token[PERMISSIONS_CLAIM] = "0"
+        self.assertFalse(self.can_feed(token))
+        token[VERSION_CLAIM] -= 1
+        self.assertTrue(self.can_feed(token))
+
+    @override_settings(RBAC_SHARED_CACHE=True)
+    def test_revocation_applies_to_the_next_request(self):
+        token = self.access_token()
+        self.assertTrue(self.can_feed(token))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.link.delete()
+        self.assertFalse(self.can_feed(token))
+
+    def test_claims_ignored_on_process_local_cache(self):
+        token = self.access_token()
+        self.revoke_elsewhere()
+        self.assertFalse(self.can_feed(token))
+
+
+class PermissionCheckTests(APITestCase):
+    url = "/api/rbac/me/permissions/check/"
+
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        user = get_user_model().objects.create_user(username="u", email="u@example.com", password="pw")
+        with self.captureOnCommitCallbacks(execute=True):
+            role = Role.objects.create(name="Keeper", slug="keeper")
+            for code in ("zoo.feed", "zoo.clean", "farm.feed"):
+                module, action = code.split(".")
+                permission = Permission.objects.create(code=code, module=module, action=action)
+                if code != "zoo.clean":
+                    RolePermission.objects.create(role=role, permission=permission)
+            UserRole.objects.create(user=user, role=role)
+        self.client.force_authenticate(user)
+
+    def test_single_code(self):
+        response = self.client.get(self.url, {"code": "zoo.feed"})
+        self.assertEqual(response.data, {"code": "zoo.feed", "allowed": True})
+
+    def test_empty_code_is_rejected(self):
+        self.assertEqual(self.client.get(self.url, {"code": ""}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"codes": " , "}).status_code, 400)
+
+    def test_codes_list_and_repeated_code(self):
+        expected = {"zoo.feed": True, "zoo.clean": False}
+        response = self.client.get(self.url, {"codes": "zoo.feed, zoo.clean"})
+        self.assertEqual(response.data, {"results": expected, "matches": {}})
+        response = self.client.get(self.url, {"code": ["zoo.feed", "zoo.clean"]})
+        self.assertEqual(response.data, {"results": expected, "matches": {}})
+
+    def test_post_body_with_wildcards(self):
+        response = self.client.post(self.url, {"codes": ["zoo.*", "farm.feed", "cars.*"]}, format="json")
+        self.assertEqual(response.data["results"], {"zoo.*": True, "farm.feed": True, "cars.*": False})
+        self.assertEqual(response.data["matches"], {"zoo.*": ["zoo.feed"], "cars.*": []})
+
+    def test_post_body_must_list_codes(self):
+        for body in ({}, {"codes": []}, {"codes": "zoo.feed"}, {"codes": [1]}):
+            self.assertEqual(self.client.post(self.url, body, format="json").status_code, 400, body)
+
+    @mock.patch.object(PermissionCheckView, "max_codes", 2)
+    def test_max_codes(self):
+        self.assertEqual(self.client.get(self.url, {"codes": "zoo.feed,zoo.clean"}).status_code, 200)
+        self.assertEqual(self.client.get(self.url, {"codes": "zoo.feed,zoo.clean,farm.feed"}).status_code, 400)
+        response = self.client.post(self.url, {"codes": ["zoo.feed", "zoo.clean", "farm.feed"]}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class ListingQueryCountTests(APITestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        admin = get_user_model().objects.create_superuser(username="root", email="root@example.com", password="pw")
+        self.client.force_authenticate(admin)
+        # Slug order differs from name order, which Role.Meta.ordering uses.
+        self.roles = [
+            Role.objects.create(name="Alpha", slug="zeta"),
+            Role.objects.create(name="Zulu", slug="alpha"),
+        ]
+        self.permissions = [
+            Permission.objects.create(code=f"zoo.p{i}", module="zoo", action=f"p{i}") for i in range(3)
+        ]
+
+    def add_roles(self, count):
+        for _ in range(count):
+            n = Role.all_objects.count()
+            role = Role.objects.create(name=f"Role {n}", slug=f"role-{n}")
+            RolePermission.objects.bulk_create(RolePermission(role=role, permission=p) for p in self.permissions)
+
+    def add_users(self, count):
+        for _ in range(count):
+            n = get_user_model().objects.count()
+            user = get_user_model().objects.create_user(username=f"u{n}", email=f"u{n}@example.com", password="pw")
+            UserRole.objects.bulk_create(UserRole(user=user, role=role) for role in self.roles)
+
+    def count_queries(self, url):
+        self.client.get(url)  # warm the process-wide catalog snapshot
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_role_listing_query_count_is_constant(self):
+        self.add_roles(1)
+        expected = self.count_queries("/api/rbac/roles/")
+        self.add_roles(5)
+        with self.assertNumQueries(expected):
+            response = self.client.get("/api/rbac/roles/")
+        self.assertEqual(len(response.data), Role.objects.count())
+
+    def test_user_listing_query_count_is_constant(self):
+        self.add_users(1)
+        expected = self.count_queries("/api/rbac/users/")
+        self.add_users(5)
+        with self.assertNumQueries(expected):
+            response = self.client.get("/api/rbac/users/")
+        self.assertEqual(len(response.data["results"]), 7)
+
+    def test_role_slugs_share_one_order(self):
+        self.add_users(1)
+        user = get_user_model().objects.get(username="u1")
+        listed = {row["username"]: row["roles"] for row in self.client.get("/api/rbac/users/").data["results"]}
+        self.assertEqual(listed["u1"], ["alpha", "zeta"])
+        self.assertEqual(user.get_role_slugs(), ["alpha", "zeta"])
+        self.assertEqual(async_to_sync(user.aget_role_slugs)(), ["alpha", "zeta"])
+
+
+class PurgeSoftDeletedTests(TestCase):
+    def setUp(self):
+        self.menu = Menu.objects.create(name="Side", slug="side")
+        self.parent = MenuItem.objects.create(menu=self.menu, label="Parent")
+        self.child = MenuItem.objects.create(menu=self.menu, parent=self.parent, label="Child")
+        self.role = Role.objects.create(name="Old", slug="old")
+        self.permission = Permission.objects.create(code="old.view", module="old", action="view")
+
+    def soft_delete(self, obj, days_ago=400):
+        type(obj).all_objects.filter(pk=obj.pk).update(
+            is_deleted=True, deleted_at=timezone.now() - timedelta(days=days_ago)
+        )
+
+    def purge(self, *args):
+        call_command("purge_soft_deleted", "--days", "90", *args, stdout=StringIO())
+
+    def test_archives_old_soft_deleted_rows(self):
+        self.soft_delete(self.role)
+        self.purge()
+        self.assertFalse(Role.all_objects.filter(pk=self.role.pk).exists())
+        record = ArchivedRecord.objects.get(model="rbac.role")
+        self.assertEqual(record.object_pk, str(self.role.pk))
+        self.assertEqual(record.data["slug"], "old")
+
+    def test_no_archive_only_deletes(self):
+        self.soft_delete(self.role)
+        self.purge("--no-archive")
+        self.assertFalse(Role.all_objects.filter(pk=self.role.pk).exists())
+        self.assertFalse(ArchivedRecord.objects.exists())
+
+    def test_keeps_recent_and_live_rows(self):
+        self.soft_delete(self.role, days_ago=10)
+        self.purge()
+        self.assertTrue(Role.all_objects.filter(pk=self.role.pk).exists())
+        self.assertTrue(Menu.objects.filter(pk=self.menu.pk).exists())
+
+    def test_skips_rows_with_live_dependents(self):
+        self.soft_delete(self.parent)
+        self.purge()
+        self.assertTrue(MenuItem.all_objects.filter(pk=self.parent.pk).exists())
+        self.assertTrue(MenuItem.objects.filter(pk=self.child.pk).exists())
+
+    def test_never_purges_permissions(self):
+        self.soft_delete(self.permission)
+        self.purge()
+        self.assertTrue(Permission.all_objects.filter(pk=self.permission.pk).exists())
+        replacement = Permission.objects.create(code="new.view", module="new", action="view")
+        self.assertGreater(replacement.bit, self.permission.bit)
+
+
+class BulkAssignRoleTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(username="root", email="root@example.com", password="pw")
+        self.users = [
+            User.objects.create_user(username=f"u{i}", email=f"u{i}@example.com", password="pw") for i in range(3)
+        ]
+        self.role = Role.objects.create(name="Editor", slug="editor")
+        self.client.force_authenticate(self.admin)
+        self.url = f"/api/rbac/roles/{self.role.pk}/users/"
+
+    def test_assigns_known_users(self):
+        ids = [str(user.pk) for user in self.users]
+        response = self.client.post(self.url, {"action": "assign", "user_ids": ids, "chunk_size": 2}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["processed"], 3)
+        self.assertEqual(UserRole.objects.filter(role=self.role).count(), 3)
+
+    def test_unknown_ids_are_rejected_before_writing(self):
+        missing = "00000000-0000-0000-0000-000000000000"
+        response = self.client.post(
+            self.url, {"action": "assign", "user_ids": [str(self.users[0].pk), missing]}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(missing, response.data["user_ids"][0])
+        self.assertFalse(UserRole.objects.filter(role=self.role).exists())
+
+    def test_filters_select_a_cohort(self):
+        self.users[0].is_active = False
+        self.users[0].save()
+        response = self.client.post(
+            self.url, {"action": "assign", "filters": {"is_active": "false", "is_superuser": False}}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(UserRole.objects.filter(role=self.role).values_list("user", flat=True)), [self.users[0].pk])
+
+    def test_invalid_filter_values_are_rejected(self):
+        for filters in ({"date_joined__gte": "garbage"}, {"is_active": ["x"]}, {"is_active": "maybe"}):
+            response = self.client.post(self.url, {"action": "assign", "filters": filters}, format="json")
+            self.assertEqual(response.status_code, 400, filters)
+            self.assertIn("filters", response.data)
+        self.assertFalse(UserRole.objects.filter(role=self.role).exists())
+
+    def test_command_rejects_unknown_ids(self):
+        with self.assertRaisesMessage(CommandError, "not-a-uuid"):
+            call_command("bulk_assign_role", "--role", "editor", "--ids", f"{self.users[0].pk},not-a-uuid", stdout=StringIO())
+        self.assertFalse(UserRole.objects.filter(role=self.role).exists())
+
+
+class MePermissionsETagTests(APITestCase):
+    url = "/api/rbac/me/permissions/"
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="u", email="u@example.com", password="pw")
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_user_gets_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_user_change_invalidates_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_superuser = True
+            self.user.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class MenuOrderingTests(APITestCase):
+    def setUp(self):
+        admin = get_user_model().objects.create_superuser(username="root", email="root@example.com", password="pw")
+        self.client.force_authenticate(admin)
+        self.menu = Menu.objects.create(name="Side", slug="side")
+        self.a, self.b, self.c = (
+            MenuItem.objects.create(menu=self.menu, label=label, sort_order=(idx + 1) * 1024)
+            for idx, label in enumerate("abc")
+        )
+        self.reorder_url = f"/api/rbac/menus/{self.menu.pk}/items/reorder/"
+
+    def labels(self):
+        return list(MenuItem.objects.filter(menu=self.menu, parent=None).values_list("label", flat=True))
+
+    def move(self, item, **body):
+        return self.client.post(f"/api/rbac/menu-items/{item.pk}/move/", body, format="json")
+
+    def test_reorder_applies_complete_order(self):
+        order = [{"id": self.c.pk}, {"id": self.a.pk}, {"id": self.b.pk}]
+        response = self.client.post(self.reorder_url, {"order": order}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.labels(), ["c", "a", "b"])
+
+    def test_reorder_rejects_partial_sibling_group(self):
+        order = [{"id": self.c.pk}, {"id": self.a.pk}]
+        response = self.client.post(self.reorder_url, {"order": order}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(self.b.pk), response.data["order"][0])
+        self.assertEqual(self.labels(), ["a", "b", "c"])
+
+    def test_move_between_siblings(self):
+        response = self.move(self.c, after=self.a.pk, before=self.b.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.labels(), ["a", "c", "b"])
+
+    def test_move_rejects_inverted_neighbours(self):
+        response = self.move(self.c, after=self.b.pk, before=self.a.pk)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.labels(), ["a", "b", "c"])
+
+    def test_move_rejects_non_sibling(self):
+        child = MenuItem.objects.create(menu=self.menu, parent=self.a, label="child")
+        response = self.move(self.c, after=child.pk)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("detail", response.data)
+
+
+class PermissionCatalogListTests(APITestCase):
+    def test_entries_match_permission_serializer(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Permission.objects.create(code="zoo.feed", module="zoo", action="feed", description="Feed animals")
+        admin = get_user_model().objects.create_superuser(username="root", email="root@example.com", password="pw")
+        self.client.force_authenticate(admin)
+        response = self.client.get("/api/rbac/permissions/")
+        self.assertEqual(response.status_code, 200)
+        expected = PermissionSerializer(Permission.objects.all(), many=True).data
+        self.assertEqual(response.json(), [dict(row) for row in expected])
+        self.assertEqual(set(response.json()[0]), set(PermissionSerializer.Meta.fields))
+
+
+class RouteIndexTests(TestCase):
+    def index(self, *paths):
+        return RouteIndex(PageRoute(path, path, path, "SYSTEM", None) for path in paths)
+
+    def match(self, index, path):
+        found = index.match(path)
+        return found and (found[0].path, found[1])
+
+    def test_param_names_belong_to_their_route(self):
+        index = self.index("/hotels/:id", "/hotels/{hotelId}/rooms", "/hotels/<int:pk>/rooms/<roomId>")
+        self.assertEqual(self.match(index, "/hotels/7"), ("/hotels/:id", {"id": "7"}))
+        self.assertEqual(self.match(index, "/hotels/7/rooms"), ("/hotels/{hotelId}/rooms", {"hotelId": "7"}))
+        self.assertEqual(
+            self.match(index, "/hotels/7/rooms/3"),
+            ("/hotels/<int:pk>/rooms/<roomId>", {"pk": "7", "roomId": "3"}),
+        )
+
+    def test_static_segments_and_deepest_match_win(self):
+        index = self.index("/hotels/:id", "/hotels/new", "/hotels/*")
+        self.assertEqual(self.match(index, "/hotels/new"), ("/hotels/new", {}))
+        self.assertEqual(self.match(index, "/hotels/7"), ("/hotels/:id", {"id": "7"}))
+        self.assertEqual(self.match(index, "/hotels/7/reviews"), ("/hotels/*", {}))
+        self.assertIsNone(index.match("/cars"))
+
+    def test_static_segment_is_not_backtracked(self):
+        index = self.index("/hotels/new", "/hotels/:id/rooms", "/hotels/:id/*")
+        self.assertEqual(self.match(index, "/hotels/7/rooms"), ("/hotels/:id/rooms", {"id": "7"}))
+        self.assertEqual(self.match(index, "/hotels/7/rooms/2"), ("/hotels/:id/*", {"id": "7"}))
+        self.assertIsNone(index.match("/hotels/new/rooms"))
+
+
+class ReplaceUserRolesTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(username="root", email="root@example.com", password="pw")
+        self.user = User.objects.create_user(username="u", email="u@example.com", password="pw", role="customer")
+        self.client.force_authenticate(self.admin)
+        self.url = f"/api/rbac/users/{self.user.pk}/roles/"
+
+    def put_roles(self, roles):
+        response = self.client.put(self.url, {"roles": roles}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        return response
+
+    def test_replaces_role_links(self):
+        response = self.put_roles(["admin", "customer"])
+        self.assertCountEqual(response.data["roles"], ["admin", "customer"])
+        self.put_roles(["customer"])
+        self.assertEqual(self.user.get_role_slugs(), ["customer"])
+
+    def test_malformed_user_id_is_not_found(self):
+        response = self.client.put("/api/rbac/users/not-a-uuid/roles/", {"roles": []}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+    def test_keeps_legacy_role_field_in_step(self):
+        self.put_roles(["admin", "customer"])
+        self.assertEqual(self.user.role, "admin")
+        self.put_roles(["customer"])
+        self.assertEqual(self.user.role, "customer")
+        self.put_roles([])
+        self.assertEqual(self.user.role, "customer")
+
+
+class PermissionExpressionTests(APITestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+
+    def test_invalid_stored_expression_denies(self):
+        catalog = get_catalog()
+        everything = PermissionSet(catalog.all_mask, catalog)
+        with self.assertLogs("apps.rbac.expressions", "WARNING"):
+            self.assertFalse(expression_allows(everything, {"bogus": ["rbac.manage_roles"]}))
+            self.assertFalse(expression_allows(everything, {"any": []}))
+        self.assertTrue(expression_allows(everything, {"any": ["rbac.manage_roles"]}))
+
+    def test_dashboard_hides_items_with_invalid_expressions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            menu = Menu.objects.create(name="Extra", slug="extra", location="sidebar")
+            MenuItem.objects.create(menu=menu, key="open", label="Open", path="/open")
+            broken = MenuItem.objects.create(menu=menu, key="broken", label="Broken", path="/broken")
+            # Written around the serializer, like rows stored before validation existed.
+            MenuItem.objects.filter(pk=broken.pk).update(permission={"bogus": 1})
+        user = get_user_model().objects.create_user(username="u", email="u@example.com", password="pw")
+        self.client.force_authenticate(user)
+        with self.assertLogs("apps.rbac.expressions", "WARNING"):
+            response = self.client.get("/api/dashboard/config/")
+        self.assertEqual(response.status_code, 200)
+        keys = [item["key"] for item in response.json()["menu"]]
+        self.assertIn("open", keys)
+        self.assertNotIn("broken", keys)
+        self.assertTrue(all("permission_key" not in item for item in response.json()["menu"]))
+
+    def test_menu_tree_carries_precomputed_keys(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            menu = Menu.objects.create(name="Extra", slug="extra", location="extra")
+            MenuItem.objects.create(menu=menu, key="a", label="A", permission=["b.view", "a.view"])
+        (node,) = build_menu_tree(location="extra")
+        self.assertEqual(node["permission_key"], '["b.view","a.view"]')
+
+
+class MenuTreeTests(APITestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        user = get_user_model().objects.create_user(username="u", email="u@example.com", password="pw")
+        self.client.force_authenticate(user)
+
+    def dashboard_menu(self):
+        response = self.client.get("/api/dashboard/config/")
+        self.assertEqual(response.status_code, 200)
+        return [item["key"] for item in response.json()["menu"]]
+
+    def test_deactivated_items_do_not_fall_back_to_static_menu(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            MenuItem.objects.filter(menu__location="sidebar").update(is_active=False)
+        self.assertEqual(self.dashboard_menu(), [])
+
+    def test_static_menu_only_without_any_menu(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Menu.objects.filter(location="sidebar").delete()
+        self.assertEqual(self.dashboard_menu(), ["dashboard", "settings", "customers"])
+
+    def test_moving_an_item_refreshes_both_menus(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            source = Menu.objects.create(name="Source", slug="source")
+            target = Menu.objects.create(name="Target", slug="target")
+            MenuItem.objects.create(menu=source, key="item", label="Item")
+        self.assertEqual([node["key"] for node in build_menu_tree(slug="source")], ["item"])
+        self.assertEqual(build_menu_tree(slug="target"), [])
+
+        item = MenuItem.objects.get(key="item", menu=source)
+        item.menu = target
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+        self.assertEqual(build_menu_tree(slug="source"), [])
+        self.assertEqual([node["key"] for node in build_menu_tree(slug="target")], ["item"])
+
+
+class SharedDashboardOutputTests(APITestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        User = get_user_model()
+        self.users = [
+            User.objects.create_user(username=f"u{i}", email=f"u{i}@example.com", password="pw") for i in range(2)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            role = Role.objects.create(name="Keeper", slug="keeper")
+            permission = Permission.objects.create(code="zoo.feed", module="zoo", action="feed")
+            RolePermission.objects.create(role=role, permission=permission)
+            UserRole.objects.bulk_create(UserRole(user=user, role=role) for user in self.users)
+
+    def dashboard_menu(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get("/api/dashboard/config/")
+        self.assertEqual(response.status_code, 200)
+        return [item["label"] for item in response.json()["menu"]]
+
+    def test_same_mask_shares_one_payload_until_the_menu_changes(self):
+        with mock.patch("apps.rbac.views.build_menu_tree", wraps=build_menu_tree) as build:
+            first = self.dashboard_menu(self.users[0])
+            self.assertEqual(self.dashboard_menu(self.users[1]), first)
+            self.assertEqual(build.call_count, 1)
+
+            item = MenuItem.objects.filter(menu__location="sidebar").order_by("sort_order").first()
+            item.label = "Home"
+            with self.captureOnCommitCallbacks(execute=True):
+                item.save()
+            self.assertEqual(self.dashboard_menu(self.users[1])[0], "Home")
+            self.assertEqual(build.call_count, 2)
+
+
+class DashboardWidgetTests(TestCase):
+    def setUp(self):
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create_user(username="u", email="u@example.com", password="pw")
+        self.calls = 0
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def slow_provider(self, user):
+        self.calls += 1
+        self.release.wait(5)
+        return {"calls": self.calls}
+
+    def failing_provider(self, user):
+        raise RuntimeError("provider down")
+
+    def test_failing_provider_serves_last_good_value(self):
+        widget = Widget("flaky", "Flaky", self.failing_provider)
+        with self.assertLogs("apps.rbac.widgets", "WARNING"):
+            [result] = run_widgets([widget], self.user)
+        self.assertEqual((result["data"], result["stale"]), (None, True))
+        widget.store(self.user, {"total": 3})
+        cache.delete(widget._cache_key(self.user))
+        with self.assertLogs("apps.rbac.widgets", "WARNING"):
+            [result] = run_widgets([widget], self.user)
+        self.assertEqual((result["data"], result["stale"]), ({"total": 3}, True))
+
+    def test_timed_out_run_is_shared_and_cached_when_done(self):
+        widget = Widget("slow", "Slow", self.slow_provider, timeout=0.05)
+        with self.assertLogs("apps.rbac.widgets", "WARNING"):
+            for _ in range(3):
+                [result] = run_widgets([widget], self.user)
+                self.assertTrue(result["stale"])
+            [result] = async_to_sync(arun_widgets)([widget], self.user)
+            self.assertTrue(result["stale"])
+        self.assertEqual(self.calls, 1)
+
+        self.release.set()
+        for _ in range(50):
+            if widget.cached(self.user) is not None:
+                break
+            time.sleep(0.02)
+        [result] = run_widgets([widget], self.user)
+        self.assertEqual((result["data"], result["stale"]), ({"calls": 1}, False))
@@ -0,0 +1,83 @@
+"""
+Permission claims carried inside JWT access tokens.
+
+A token records the user's compiled permission mask together with the RBAC
+permission version it was compiled under. While that version is still current
+the claim is authoritative and no permission lookup is needed; once any RBAC
+write bumps the version, the claim is ignored and callers fall back to a live
+lookup. Claims are only trusted on a cache shared by every worker, since a
+version bump made elsewhere never reaches a process-local cache.
+"""
+from .bitset import PermissionSet, aget_catalog, get_catalog
+from .cache import aget_permission_version, cache_is_shared, get_permission_version
+
+ROLES_CLAIM = "roles"
+PERMISSIONS_CLAIM = "perms"
+SUPERUSER_CLAIM = "perm_su"
+VERSION_CLAIM = "perm_v"
+
+
+def add_permission_claims(token, user):
+    version = get_permission_version()
+    permissions = user.get_permission_codes()
+    token[ROLES_CLAIM] = user.get_role_slugs()
+    token[PERMISSIONS_CLAIM] = format(permissions.mask, "x")
+    token[SUPERUSER_CLAIM] = bool(user.is_superuser)
+    token[VERSION_CLAIM] = version
+    return token
+
+
+def _claims_match(token, user, version):
+    if not cache_is_shared():
+        return False
+    if token is None or not hasattr(token, "get"):
+        return False
+    if token.get(VERSION_CLAIM) is None or token.get(PERMISSIONS_CLAIM) is None:
+        return False
+    if token.get(SUPERUSER_CLAIM) != bool(user.is_superuser):
+        return False
+    return token.get(VERSION_CLAIM) == version
+
+
+def _decode_mask(token):
+    try:
+        return int(token.get(PERMISSIONS_CLAIM), 16)
+    except (TypeError, ValueError):
+        return None
+
+
+def _decode_roles(token):
+    roles = token.get(ROLES_CLAIM)
+    return list(roles) if isinstance(roles, list) else None
+
+
+def get_token_permissions(token, user):
+    """
+    PermissionSet decoded from the token, or None when the claim is missing or stale.
+    """
+    if not _claims_match(token, user, get_permission_version()):
+        return None
+    mask = _decode_mask(token)
+    return None if mask is None else PermissionSet(mask, get_catalog())
+
+
+async def aget_token_permissions(token, user):
+    if not _claims_match(token, user, await aget_permission_version()):
+        return None
+    mask = _decode_mask(token)
+    return None if mask is None else PermissionSet(mask, await aget_catalog())
+
+
+def get_token_roles(token, user):
+    """
+    Role slugs from the token, or None when the claim is missing or stale.
+    """
+    if not _claims_match(token, user, get_permission_version()):
+        return None
+    return _decode_roles(token)
+
+
+async def aget_token_roles(token, user):
+    if not _claims_match(token, user, await aget_permission_version()):
+        return None
+    return _decode_roles(token)
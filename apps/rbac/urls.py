@@ -1,10 +1,29 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import DashboardConfigView
+from .views import (
+    DashboardConfigView,
+    MenuItemMoveView,
+    MenuItemReorderView,
+    MePermissionsView,
+    PageResolveView,
+    PermissionCheckView,
+    PermissionViewSet,
+    RoleViewSet,
+    UserRoleViewSet,
+)
 
 router = DefaultRouter()
+router.register("rbac/permissions", PermissionViewSet, basename="rbac-permissions")
+router.register("rbac/roles", RoleViewSet, basename="rbac-roles")
+router.register("rbac/users", UserRoleViewSet, basename="rbac-users")
 
 urlpatterns = [
     path("dashboard/config/", DashboardConfigView.as_view(), name="dashboard-config"),
+    path("rbac/me/permissions/", MePermissionsView.as_view(), name="rbac-me-permissions"),
+    path("rbac/me/permissions/check/", PermissionCheckView.as_view(), name="rbac-permission-check"),
+    path("rbac/pages/resolve/", PageResolveView.as_view(), name="rbac-page-resolve"),
+    path("rbac/menus/<int:menu_id>/items/reorder/", MenuItemReorderView.as_view(), name="rbac-menu-reorder"),
+    path("rbac/menu-items/<int:pk>/move/", MenuItemMoveView.as_view(), name="rbac-menu-item-move"),
+    path("", include(router.urls)),
 ]
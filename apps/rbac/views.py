@@ -1,11 +1,49 @@
+import hashlib
+import time
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import filters, mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-User = get_user_model()
+from apps.accounts.views import CustomerPagination
+from apps.common.http import conditional_response, make_etag
+
+from .assignments import (
+    bulk_assign_role,
+    bulk_revoke_role,
+    filter_users,
+    replace_role_permissions,
+    replace_user_roles,
+)
+
+from .bitset import get_catalog
+from .cache import get_catalog_version, get_permission_version, get_user_version
+from .expressions import expression_allows
+from .menus import MenuOrderError, apply_order, build_menu_tree, get_menu_tree_key, move_item
+from .models import Menu, MenuItem, Role
+from .permissions import IsMenuAdmin, IsRBACAdmin, get_request_permission_codes, get_request_role_slugs
+from .routes import resolve_page
+from .serializers import (
+    MenuItemMoveSerializer,
+    MenuItemReorderSerializer,
+    PermissionSerializer,
+    RoleBulkAssignmentSerializer,
+    RoleCreateUpdateSerializer,
+    RolePermissionsReplaceSerializer,
+    RoleSerializer,
+    UserBasicSerializer,
+    UserRolesReplaceSerializer,
+)
+from .widgets import WIDGET_REGISTRY, run_widgets
 
-WIDGET_REGISTRY = []
+User = get_user_model()
 
 
 MENU_STATIC = [
@@ -21,18 +59,11 @@ def _filter_items_for_permissions(items, user_permissions, allow_all=False):
     """
     filtered = []
     for item in items:
-        required = item.get("permission")
         children = item.get("children")
 
-        include_item = False
-        if allow_all:
-            include_item = True
-        elif required is None:
-            include_item = True
-        elif isinstance(required, (list, tuple, set)):
-            include_item = any(code in user_permissions for code in required)
-        else:
-            include_item = required in user_permissions
+        include_item = allow_all or _permission_allows(
+            user_permissions, item.get("permission"), item.get("permission_key")
+        )
 
         filtered_children = None
         if children:
@@ -42,6 +73,7 @@ def _filter_items_for_permissions(items, user_permissions, allow_all=False):
 
         if include_item:
             new_item = dict(item)
+            new_item.pop("permission_key", None)
             if filtered_children is not None:
                 new_item["children"] = filtered_children
             filtered.append(new_item)
@@ -49,30 +81,50 @@ def _filter_items_for_permissions(items, user_permissions, allow_all=False):
     return filtered
 
 
-def _permission_allows(user_permissions, required):
+def _permission_allows(user_permissions, required, key=None):
     if required is None:
         return True
-    if isinstance(required, (list, tuple, set)):
-        return any(code in user_permissions for code in required)
-    return required in user_permissions
+    return expression_allows(user_permissions, required, key)
 
 
-class DashboardConfigView(APIView):
-    permission_classes = [IsAuthenticated]
+class DashboardConfigMixin:
+    """
+    Menu/widget assembly shared by the sync and async dashboard views.
+    """
+    menu_location = "sidebar"
 
     def _build_menu_tree(self):
-        return MENU_STATIC
+        tree = build_menu_tree(location=self.menu_location)
+        # Only a location without any menu falls back; an emptied menu stays empty.
+        return MENU_STATIC if tree is None else tree
 
-    def get(self, request):
-        user = request.user
-        permission_codes = set()  # permissions disabled
-        allow_all = True
-        role_slugs = []
+    def _filtered_output_key(self, permission_codes, allow_all):
+        """
+        Users with the same effective permission set share one filtered
+        menu/widget payload per menu and catalog version.
+        """
+        tree_key = get_menu_tree_key(location=self.menu_location) or "static"
+        if allow_all:
+            fingerprint = "all"
+        else:
+            fingerprint = hashlib.sha1(format(permission_codes.mask, "x").encode()).hexdigest()
+        return f"rbac:dashboard:{tree_key}:{get_catalog_version()}:{fingerprint}"
 
-        menu_data = _filter_items_for_permissions(self._build_menu_tree(), permission_codes, allow_all)
-        widgets = []
+    def _filtered_menu_and_widgets(self, permission_codes, allow_all):
+        key = self._filtered_output_key(permission_codes, allow_all)
+        output = cache.get(key)
+        if output is None:
+            menu_data = _filter_items_for_permissions(self._build_menu_tree(), permission_codes, allow_all)
+            widgets = [
+                widget.key for widget in WIDGET_REGISTRY.values()
+                if allow_all or _permission_allows(permission_codes, widget.permission, widget.permission_key)
+            ]
+            output = (menu_data, widgets)
+            cache.set(key, output, settings.RBAC_PERMISSION_CACHE_TIMEOUT)
+        return output
 
-        data = {
+    def _payload(self, user, role_slugs, permission_codes, menu_data, widgets):
+        return {
             "user": {
                 "id": str(user.id),
                 "username": user.username,
@@ -82,19 +134,162 @@ class DashboardConfigView(APIView):
             "menu": menu_data,
             "widgets": widgets,
         }
-        return Response(data)
 
+    def _widget_epoch(self):
+        """
+        Widget data expires on its own TTL; rotate the ETag at the shortest one.
+        """
+        ttls = [widget.ttl for widget in WIDGET_REGISTRY.values()]
+        return int(time.time() // min(ttls)) if ttls else 0
+
+
+class DashboardConfigView(DashboardConfigMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_etag(self, request):
+        user = request.user
+        return make_etag(
+            user.pk,
+            get_user_version(user.pk),
+            get_permission_version(),
+            get_catalog_version(),
+            get_menu_tree_key(location=self.menu_location) or "static",
+            self._widget_epoch(),
+        )
+
+    def get(self, request):
+        return conditional_response(request, self.get_etag(request), lambda: self._get(request))
+
+    def _get(self, request):
+        user = request.user
+        permission_codes = get_request_permission_codes(request)
+        allow_all = user.is_superuser
+        role_slugs = get_request_role_slugs(request)
+
+        menu_data, widget_keys = self._filtered_menu_and_widgets(permission_codes, allow_all)
+        widgets = run_widgets([WIDGET_REGISTRY[key] for key in widget_keys if key in WIDGET_REGISTRY], user)
 
-class PermissionViewSet:
-    pass
+        return Response(self._payload(user, role_slugs, permission_codes, menu_data, widgets))
 
 
-class RoleViewSet:
-    pass
+class PermissionViewSet(viewsets.ViewSet):
+    """
+    Permission catalog listing, served from the process-wide catalog snapshot
+    (no query) and rendered through PermissionSerializer.
+    """
+    permission_classes = [IsAuthenticated, IsRBACAdmin]
+
+    def list(self, request):
+        etag = make_etag("permission-catalog", get_catalog_version())
+        return conditional_response(
+            request, etag, lambda: Response(PermissionSerializer(get_catalog().entries, many=True).data)
+        )
+
+
+class RoleViewSet(viewsets.ModelViewSet):
+    """
+    Role CRUD plus `PUT /roles/{id}/permissions/` to replace a role's permissions.
+    """
+    permission_classes = [IsAuthenticated, IsRBACAdmin]
+    queryset = Role.objects.all()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ("list", "retrieve"):
+            queryset = queryset.prefetch_related(Role.permission_codes_prefetch())
+        return queryset
 
+    def get_serializer_class(self):
+        if self.action in ("list", "retrieve", "permissions", "bulk_users"):
+            return RoleSerializer
+        return RoleCreateUpdateSerializer
 
-class UserRoleViewSet:
-    pass
+    def list(self, request, *args, **kwargs):
+        etag = make_etag("roles", get_permission_version())
+        return conditional_response(request, etag, lambda: super(RoleViewSet, self).list(request, *args, **kwargs))
+
+    @action(detail=True, methods=["put"])
+    def permissions(self, request, pk=None):
+        role = self.get_object()
+        serializer = RolePermissionsReplaceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        replace_role_permissions(role, serializer.validated_data["permissions"])
+        return Response(RoleSerializer(role).data)
+
+    @action(detail=True, methods=["post"], url_path="users")
+    def bulk_users(self, request, pk=None):
+        """
+        Grant or revoke the role for a list of user ids or a filtered cohort.
+        """
+        role = self.get_object()
+        serializer = RoleBulkAssignmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        if "filters" in data:
+            user_ids = filter_users(data["filters"]).values_list("pk", flat=True).iterator(chunk_size=data["chunk_size"])
+        else:
+            user_ids = data["user_ids"]
+        if data["action"] == "assign":
+            processed = bulk_assign_role(role, user_ids, assigned_by=request.user, chunk_size=data["chunk_size"])
+        else:
+            processed = bulk_revoke_role(role, user_ids, chunk_size=data["chunk_size"])
+        return Response({"role": role.slug, "action": data["action"], "processed": processed})
+
+
+class UserRoleViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    User listing for role assignment plus `PUT /users/{id}/roles/` to replace a user's roles.
+    """
+    permission_classes = [IsAuthenticated, IsRBACAdmin]
+    serializer_class = UserBasicSerializer
+    pagination_class = CustomerPagination
+    filter_backends = [filters.SearchFilter]
+    search_fields = ["username", "email", "first_name", "last_name"]
+
+    def get_queryset(self):
+        return User.objects.order_by("username").prefetch_related(User.role_slugs_prefetch())
+
+    @action(detail=True, methods=["put"])
+    def roles(self, request, pk=None):
+        user = get_object_or_404(User, pk=pk)
+        serializer = UserRolesReplaceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        replace_user_roles(user, serializer.validated_data["roles"], assigned_by=request.user)
+        return Response(UserBasicSerializer(user).data)
+
+
+class MenuItemReorderView(APIView):
+    """
+    Apply a complete new ordering to a menu's items in a single UPDATE.
+    """
+    permission_classes = [IsAuthenticated, IsMenuAdmin]
+
+    def post(self, request, menu_id):
+        menu = get_object_or_404(Menu, pk=menu_id)
+        serializer = MenuItemReorderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            ranks = apply_order(menu, serializer.validated_data["order"])
+        except MenuOrderError as exc:
+            raise ValidationError({exc.field: [str(exc)]})
+        return Response({"order": [{"id": pk, "sort_order": rank} for pk, rank in ranks.items()]})
+
+
+class MenuItemMoveView(APIView):
+    """
+    Move one item between two siblings, rewriting only that item's row.
+    """
+    permission_classes = [IsAuthenticated, IsMenuAdmin]
+
+    def post(self, request, pk):
+        item = get_object_or_404(MenuItem, pk=pk)
+        serializer = MenuItemMoveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            rank = move_item(item, **serializer.validated_data)
+        except MenuOrderError as exc:
+            raise ValidationError({exc.field: [str(exc)]})
+        return Response({"id": item.pk, "sort_order": rank})
 
 
 class MePermissionsView(APIView):
@@ -105,20 +300,86 @@ class MePermissionsView(APIView):
 
   def get(self, request):
     user = request.user
-    roles = list(user.roles.values_list("slug", flat=True))
-    permissions = sorted(user.get_permission_codes())
+    etag = make_etag(user.pk, get_user_version(user.pk), get_permission_version(), get_catalog_version())
+    return conditional_response(request, etag, lambda: self._get(request))
+
+  def _get(self, request):
+    roles = get_request_role_slugs(request)
+    permissions = sorted(get_request_permission_codes(request))
     return Response({"roles": roles, "permissions": permissions})
 
 
+class PageResolveView(APIView):
+  """
+  Resolve a frontend path (`?path=/customers/42`) to its PageRegistry entry
+  and whether the authenticated user may open it.
+  """
+  permission_classes = [IsAuthenticated]
+
+  def get(self, request):
+    path = request.query_params.get("path")
+    if not path:
+      return Response({"detail": "Query param 'path' is required."}, status=status.HTTP_400_BAD_REQUEST)
+    found = resolve_page(path)
+    if found is None:
+      return Response({"detail": "No page is registered for this path."}, status=status.HTTP_404_NOT_FOUND)
+    route, params = found
+    allowed = route.permission is None or expression_allows(
+      get_request_permission_codes(request), route.permission, route.permission_key
+    )
+    return Response({
+      "key": route.key,
+      "title": route.title,
+      "path": route.path,
+      "type": route.type,
+      "params": params,
+      "permission": route.permission,
+      "allowed": allowed,
+    })
+
+
 class PermissionCheckView(APIView):
   """
-  Check if the authenticated user has a given permission code.
+  Check if the authenticated user has one or more permission codes.
+
+  A single `code` keeps the original `{"code", "allowed"}` response. Several
+  codes (repeated `code`, a comma-separated `codes=` list, or a POSTed
+  `{"codes": [...]}` body) return a code -> allowed map resolved from a single
+  permission set; `module.*` wildcards also list every matching code held.
   """
   permission_classes = [IsAuthenticated]
+  max_codes = 200
 
   def get(self, request):
-    code = request.query_params.get("code")
-    if not code:
+    codes = [code.strip() for code in request.query_params.getlist("code") if code.strip()]
+    for value in request.query_params.getlist("codes"):
+      codes.extend(part.strip() for part in value.split(",") if part.strip())
+    if not codes:
       return Response({"detail": "Missing 'code' query param."}, status=status.HTTP_400_BAD_REQUEST)
-    allowed = user_has = request.user.has_perm_code(code)
-    return Response({"code": code, "allowed": user_has})
+    if len(codes) == 1 and "codes" not in request.query_params and not codes[0].endswith(".*"):
+      allowed = codes[0] in get_request_permission_codes(request)
+      return Response({"code": codes[0], "allowed": allowed})
+    return self._check_many(request, codes)
+
+  def post(self, request):
+    codes = request.data.get("codes") if hasattr(request.data, "get") else None
+    if not isinstance(codes, list) or not codes or not all(isinstance(code, str) for code in codes):
+      return Response({"detail": "'codes' must be a non-empty array of strings."}, status=status.HTTP_400_BAD_REQUEST)
+    return self._check_many(request, codes)
+
+  def _check_many(self, request, codes):
+    if len(codes) > self.max_codes:
+      return Response(
+        {"detail": f"At most {self.max_codes} codes can be checked per request."},
+        status=status.HTTP_400_BAD_REQUEST,
+      )
+    user_permissions = get_request_permission_codes(request)
+    results = {}
+    matches = {}
+    for code in codes:
+      if code.endswith(".*"):
+        matches[code] = sorted(user_permissions.matching(code))
+        results[code] = bool(matches[code])
+      else:
+        results[code] = code in user_permissions
+    return Response({"results": results, "matches": matches})
@@ -0,0 +1,183 @@
+"""
+Dashboard widget registry.
+
+Each widget declares the permission expression it requires, a data provider
+`provider(user) -> data`, a cache TTL and a timeout. Providers for a request
+run concurrently on a bounded thread pool shared by sync and async views. A
+provider that errors or overruns its timeout is answered from the last good
+value it produced (or None) and flagged as stale, so one slow widget never
+holds up the dashboard. At most one run per widget cache key is in flight:
+requests arriving while it runs wait on that run instead of queueing another,
+so a slow provider holds a single pool worker however many requests ask.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from .expressions import expression_key
+
+logger = logging.getLogger(__name__)
+
+WIDGET_REGISTRY = {}
+
+_executor = None
+
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+class Widget:
+    def __init__(self, key, title, provider, permission=None, ttl=60, timeout=2.0, per_user=False):
+        self.key = key
+        self.title = title
+        self.provider = provider
+        self.permission = permission
+        self.permission_key = None if permission is None else expression_key(permission)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.per_user = per_user
+
+    def describe(self):
+        return {"key": self.key, "title": self.title, "permission": self.permission}
+
+    def _cache_key(self, user):
+        scope = user.pk if self.per_user else "shared"
+        return f"rbac:widget:{self.key}:{scope}"
+
+    def cached(self, user):
+        return cache.get(self._cache_key(user))
+
+    def fallback(self, user):
+        return cache.get(self._cache_key(user) + ":last")
+
+    def store(self, user, data):
+        key = self._cache_key(user)
+        cache.set(key, data, self.ttl)
+        cache.set(key + ":last", data, None)
+
+    def run(self, user):
+        """
+        Call the provider and cache what it returns, even when every request
+        waiting on it has already given up.
+        """
+        close_old_connections()
+        try:
+            data = self.provider(user)
+        finally:
+            close_old_connections()
+        self.store(user, data)
+        return data
+
+
+def register_widget(key, title, permission=None, ttl=60, timeout=2.0, per_user=False):
+    """
+    Decorator registering `provider(user)` as a dashboard widget.
+    """
+
+    def decorator(provider):
+        WIDGET_REGISTRY[key] = Widget(key, title, provider, permission, ttl, timeout, per_user)
+        return provider
+
+    return decorator
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.DASHBOARD_WIDGET_WORKERS,
+            thread_name_prefix="dashboard-widget",
+        )
+    return _executor
+
+
+def _finish(key, future):
+    with _in_flight_lock:
+        if _in_flight.get(key) is future:
+            del _in_flight[key]
+
+
+def _submit(widget, user):
+    """
+    Future for a run of `widget`, joining the one already in flight for the
+    same cache key if there is one.
+    """
+    key = widget._cache_key(user)
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is not None:
+            return future
+        future = _in_flight[key] = _get_executor().submit(widget.run, user)
+    future.add_done_callback(partial(_finish, key))
+    return future
+
+
+def _result(widget, data, stale=False):
+    return {**widget.describe(), "data": data, "stale": stale}
+
+
+def _fallback_result(widget, user, exc):
+    logger.warning("Dashboard widget %s failed: %r", widget.key, exc)
+    return _result(widget, widget.fallback(user), stale=True)
+
+
+def run_widgets(widgets, user):
+    """
+    Resolve widget data on the bounded thread pool; each widget gets its own
+    deadline measured from the start of the batch.
+    """
+    results = {}
+    pending = {}
+    started = time.monotonic()
+    for widget in widgets:
+        data = widget.cached(user)
+        if data is not None:
+            results[widget.key] = _result(widget, data)
+        else:
+            pending[widget.key] = (widget, _submit(widget, user))
+
+    for key, (widget, future) in pending.items():
+        remaining = max(0.0, widget.timeout - (time.monotonic() - started))
+        try:
+            data = future.result(timeout=remaining)
+        except Exception as exc:  # includes the future's TimeoutError
+            results[key] = _fallback_result(widget, user, exc)
+        else:
+            results[key] = _result(widget, data)
+    return [results[widget.key] for widget in widgets]
+
+
+async def arun_widgets(widgets, user):
+    """
+    asyncio counterpart of run_widgets for async views.
+    """
+
+    async def resolve(widget):
+        data = await sync_to_async(widget.cached)(user)
+        if data is not None:
+            return _result(widget, data)
+        try:
+            # Shielded: timing out must not cancel a run other requests share.
+            future = asyncio.wrap_future(_submit(widget, user))
+            data = await asyncio.wait_for(asyncio.shield(future), timeout=widget.timeout)
+        except Exception as exc:
+            return await sync_to_async(_fallback_result)(widget, user, exc)
+        return _result(widget, data)
+
+    return list(await asyncio.gather(*(resolve(widget) for widget in widgets)))
+
+
+@register_widget("customer_count", "Customers", permission="reports.view", ttl=300)
+def customer_count(user):
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    return {"total": User.objects.filter(role=User.Roles.CUSTOMER).count()}
@@ -0,0 +1,109 @@
+"""
+Compare throughput of the sync DRF endpoints with their async-native twins
+under /api/async/ on a running server.
+
+Run the app under an ASGI server, e.g.
+
+    uvicorn config.asgi:application --workers 1
+    python benchmarks/async_endpoints.py --user admin --concurrency 200 --slow-client 0.05
+
+Each simulated client sends its request line, waits `--slow-client` seconds
+before finishing the headers (a slow upload/mobile client), then reads the
+whole response. Sync views hold a worker thread for the duration of each
+request; async views only hold a coroutine.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+ENDPOINTS = [
+    "me/",
+    "dashboard/config/",
+    "rbac/me/permissions/",
+    "customers/",
+]
+
+
+def issue_token(username):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django
+
+    django.setup()
+    from apps.accounts.models import User
+    from apps.accounts.serializers import MyTokenObtainPairSerializer
+
+    user = User.objects.get(username=username)
+    return str(MyTokenObtainPairSerializer.get_token(user).access_token)
+
+
+async def fetch(host, port, path, token, slow_client):
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n".encode())
+    await writer.drain()
+    if slow_client:
+        await asyncio.sleep(slow_client)
+    writer.write(f"Authorization: Bearer {token}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status = int(response.split(b" ", 2)[1]) if response else 0
+    return status, time.perf_counter() - started
+
+
+async def run(base_url, path, token, total, concurrency, slow_client):
+    parts = urlsplit(base_url)
+    host, port = parts.hostname, parts.port or 80
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            return await fetch(host, port, parts.path.rstrip("/") + path, token, slow_client)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for _, latency in results)
+    errors = sum(1 for status, _ in results if status != 200)
+    return {
+        "rps": total / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--token", help="Access token; issued for --user when omitted.")
+    parser.add_argument("--user", help="Username to issue a token for (needs DB access).")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--slow-client", type=float, default=0.0, help="Seconds each client stalls mid-request.")
+    args = parser.parse_args()
+
+    token = args.token or (issue_token(args.user) if args.user else None)
+    if not token:
+        parser.error("Pass --token or --user.")
+
+    print(f"{'endpoint':<24}{'mode':<7}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for endpoint in ENDPOINTS:
+        for mode, prefix in (("sync", "/api/"), ("async", "/api/async/")):
+            stats = asyncio.run(
+                run(args.base_url, prefix + endpoint, token, args.requests, args.concurrency, args.slow_client)
+            )
+            print(
+                f"{endpoint:<24}{mode:<7}{stats['rps']:>10.1f}{stats['p50']:>10.1f}"
+                f"{stats['p95']:>10.1f}{stats['errors']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from apps.accounts.async_views import AsyncCustomerListView, AsyncMeView
+from apps.rbac.async_views import AsyncDashboardConfigView, AsyncMePermissionsView
+
+urlpatterns = [
+    path("me/", AsyncMeView.as_view(), name="async-me"),
+    path("customers/", AsyncCustomerListView.as_view(), name="async-customers"),
+    path("dashboard/config/", AsyncDashboardConfigView.as_view(), name="async-dashboard-config"),
+    path("rbac/me/permissions/", AsyncMePermissionsView.as_view(), name="async-rbac-me-permissions"),
+]
@@ -108,6 +108,49 @@ DATABASES = {
     )
 }
 
+# --------------------
+# Cache (via CACHE_URL)
+# --------------------
+# RBAC permission sets are cached here and invalidated through version stamps,
+# so multi-process deployments need a shared backend, e.g.:
+#   CACHE_URL=redis://127.0.0.1:6379/1
+#   CACHE_URL=pymemcache://127.0.0.1:11211
+CACHES = {
+    "default": env.cache(
+        "CACHE_URL",
+        default="locmemcache://",
+    )
+}
+
+# Whether CACHES is shared by every worker. Permission sets are only cached
+# (and token permission claims only trusted) on a shared cache; unset means
+# any backend except locmem/dummy is assumed to be shared.
+RBAC_SHARED_CACHE = env.bool("RBAC_SHARED_CACHE", default=None)
+
+RBAC_PERMISSION_CACHE_TIMEOUT = env.int(
+    "RBAC_PERMISSION_CACHE_TIMEOUT",
+    default=60 * 60,  # 1 hour
+)
+RBAC_CATALOG_TTL = env.int(
+    "RBAC_CATALOG_TTL",
+    default=5 * 60,  # seconds; upper bound on catalog staleness per process
+)
+
+RBAC_SOFT_DELETE_RETENTION_DAYS = env.int(
+    "RBAC_SOFT_DELETE_RETENTION_DAYS",
+    default=90,  # soft-deleted rows older than this are archived by purge_soft_deleted
+)
+
+PAGINATION_COUNT_CACHE_TTL = env.int(
+    "PAGINATION_COUNT_CACHE_TTL",
+    default=60,  # seconds a cached listing total (count=cached) is reused
+)
+
+DASHBOARD_WIDGET_WORKERS = env.int(
+    "DASHBOARD_WIDGET_WORKERS",
+    default=8,  # threads shared by all requests for widget providers
+)
+
 # --------------------
 # DRF & JWT
 # --------------------
@@ -6,4 +6,5 @@ urlpatterns = [
     path("api/", include("apps.accounts.profile_urls")),
     path("api/", include("apps.accounts.urls")),  # expose customer list at /api/customers/
     path("api/", include("apps.rbac.urls")),  # dashboard config
+    path("api/async/", include("config.async_urls")),  # ASGI-native read endpoints
 ]